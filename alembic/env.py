@@ -28,7 +28,8 @@ target_metadata = Base.metadata
 
 def get_url():
     """Get database URL from settings."""
-    return settings.database_url
+    # Migrations run synchronously, so swap the app's asyncpg driver for psycopg2
+    return settings.database_url.replace("+asyncpg", "")
 
 
 def run_migrations_offline() -> None:
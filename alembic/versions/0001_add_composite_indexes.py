@@ -0,0 +1,45 @@
+"""Add composite indexes matching CRUD filter paths
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # scripts/003 creates the same indexes, so either may have run first
+    op.create_index(
+        "ix_nodes_name_domain", "nodes", ["name", "domain_id"], unique=True, if_not_exists=True
+    )
+    op.create_index(
+        "ix_nodes_domain_type", "nodes", ["domain_id", "node_type"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_msg_conn_ts",
+        "node_messages",
+        ["connection_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_msg_type_ts",
+        "node_messages",
+        ["message_type", sa.text("timestamp DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_msg_type_ts", table_name="node_messages")
+    op.drop_index("ix_msg_conn_ts", table_name="node_messages")
+    op.drop_index("ix_nodes_domain_type", table_name="nodes")
+    op.drop_index("ix_nodes_name_domain", table_name="nodes")
@@ -0,0 +1,44 @@
+"""Add status composite indexes for id-ordered listings
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The single-column status indexes are prefixes of the composites below.
+    # They are ix_* when the schema came from create_all and idx_* when it came
+    # from scripts/, so drop whichever exists.
+    op.drop_index("ix_ros_domains_agent_status", table_name="ros_domains", if_exists=True)
+    op.drop_index("idx_domains_status", table_name="ros_domains", if_exists=True)
+    op.drop_index("ix_nodes_status", table_name="nodes", if_exists=True)
+    op.drop_index("idx_nodes_status", table_name="nodes", if_exists=True)
+    # scripts/003 creates these too
+    op.create_index(
+        "ix_ros_domains_status_id", "ros_domains", ["agent_status", "id"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_nodes_status_id", "nodes", ["status", "id"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_nodes_domain_status", "nodes", ["domain_id", "status"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_nodes_domain_status", table_name="nodes")
+    op.drop_index("ix_nodes_status_id", table_name="nodes")
+    op.drop_index("ix_ros_domains_status_id", table_name="ros_domains")
+    op.create_index("ix_nodes_status", "nodes", ["status"])
+    op.create_index("ix_ros_domains_agent_status", "ros_domains", ["agent_status"])
@@ -0,0 +1,47 @@
+"""Store JSON columns as JSONB and GIN-index message payloads
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = [
+    ("nodes", "metadata"),
+    ("node_connections", "metadata"),
+    ("node_messages", "payload"),
+]
+
+
+def upgrade() -> None:
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSONB(),
+            postgresql_using=f"{column}::jsonb",
+        )
+    # scripts/003 creates the same index
+    op.create_index(
+        "ix_msg_payload_gin", "node_messages", ["payload"], postgresql_using="gin",
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_msg_payload_gin", table_name="node_messages")
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.JSON(),
+            postgresql_using=f"{column}::json",
+        )
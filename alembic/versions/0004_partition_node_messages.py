@@ -0,0 +1,127 @@
+"""Partition node_messages by month and BRIN-index timestamp
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions are created ahead of time this far; rows beyond land in
+# node_messages_default until the next partition is added
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, connection_id, message_type, payload, timestamp"
+
+
+def _create_indexes() -> None:
+    op.execute("CREATE INDEX ix_node_messages_id ON node_messages (id)")
+    op.execute("CREATE INDEX ix_node_messages_connection_id ON node_messages (connection_id)")
+    op.execute(
+        "CREATE INDEX ix_msg_conn_ts ON node_messages "
+        "(connection_id, timestamp DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX ix_msg_type_ts ON node_messages "
+        "(message_type, timestamp DESC, id DESC)"
+    )
+    op.execute("CREATE INDEX ix_msg_payload_gin ON node_messages USING gin (payload)")
+
+
+def _rename_constraints(table: str) -> None:
+    # Renaming a table keeps its constraint names, which would push the new
+    # table's constraints to node_messages_pkey1 and so on
+    for constraint in ("pkey", "connection_id_fkey"):
+        op.execute(
+            f"ALTER TABLE {table} RENAME CONSTRAINT node_messages_{constraint} TO {table}_{constraint}"
+        )
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE node_messages RENAME TO node_messages_old")
+    _rename_constraints("node_messages_old")
+    # The primary key of a partitioned table must include the partition key
+    op.execute("""
+        CREATE TABLE node_messages (
+            id INTEGER NOT NULL DEFAULT nextval('node_messages_id_seq'),
+            connection_id INTEGER NOT NULL
+                CONSTRAINT node_messages_connection_id_fkey
+                REFERENCES node_connections (id) ON DELETE CASCADE,
+            message_type VARCHAR(100),
+            payload JSONB,
+            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT node_messages_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month DATE := date_trunc(
+                'month', COALESCE((SELECT min(timestamp) FROM node_messages_old), now())
+            );
+            last_month DATE := date_trunc('month', now()) + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF node_messages FOR VALUES FROM (%L) TO (%L)',
+                    'node_messages_' || to_char(month, 'YYYY_MM'),
+                    month,
+                    month + interval '1 month'
+                );
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE node_messages_default PARTITION OF node_messages DEFAULT")
+    op.execute(f"""
+        INSERT INTO node_messages ({COLUMNS})
+        SELECT id, connection_id, message_type, payload,
+               COALESCE(timestamp, CURRENT_TIMESTAMP)
+        FROM node_messages_old
+    """)
+    # Keep the id sequence when its owning table goes away
+    op.execute("ALTER SEQUENCE node_messages_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE node_messages_old")
+    op.execute("ALTER SEQUENCE node_messages_id_seq OWNED BY node_messages.id")
+
+    _create_indexes()
+    # Rows arrive in time order, so block ranges are enough for time-range scans
+    op.execute(
+        "CREATE INDEX ix_msg_ts_brin ON node_messages "
+        "USING brin (timestamp) WITH (pages_per_range = 32)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE node_messages RENAME TO node_messages_partitioned")
+    _rename_constraints("node_messages_partitioned")
+    op.execute("""
+        CREATE TABLE node_messages (
+            id INTEGER NOT NULL DEFAULT nextval('node_messages_id_seq')
+                CONSTRAINT node_messages_pkey PRIMARY KEY,
+            connection_id INTEGER NOT NULL
+                CONSTRAINT node_messages_connection_id_fkey
+                REFERENCES node_connections (id) ON DELETE CASCADE,
+            message_type VARCHAR(100),
+            payload JSONB,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.execute(f"""
+        INSERT INTO node_messages ({COLUMNS})
+        SELECT {COLUMNS} FROM node_messages_partitioned
+    """)
+    op.execute("ALTER SEQUENCE node_messages_id_seq OWNED BY NONE")
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE node_messages_partitioned")
+    op.execute("ALTER SEQUENCE node_messages_id_seq OWNED BY node_messages.id")
+
+    _create_indexes()
+    op.execute("CREATE INDEX ix_node_messages_timestamp ON node_messages (timestamp)")
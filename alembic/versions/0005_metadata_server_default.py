@@ -0,0 +1,37 @@
+"""Default metadata columns to '{}' in the database and make them NOT NULL
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TABLES = ["nodes", "node_connections"]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(f"UPDATE {table} SET metadata = '{{}}' WHERE metadata IS NULL")
+        op.alter_column(
+            table, "metadata",
+            nullable=False,
+            server_default=sa.text("'{}'"),
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(
+            table, "metadata",
+            nullable=True,
+            server_default=None,
+        )
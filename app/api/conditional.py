@@ -0,0 +1,72 @@
+"""Conditional GET support (ETag / Last-Modified) for single-resource and cached list endpoints."""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+import orjson
+from fastapi import Request, Response
+
+
+def make_etag(data: Dict[str, Any]) -> str:
+    """Weak ETag derived from the serialized response body."""
+    digest = hashlib.blake2b(
+        orjson.dumps(data, option=orjson.OPT_SORT_KEYS), digest_size=16
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    """Parse a dumped timestamp, treating naive values as UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    data: Dict[str, Any],
+    last_modified: Optional[Any] = None
+) -> Optional[Response]:
+    """
+    Attach validators for `data` and short-circuit when the client is current.
+
+    Sets `ETag` (and `Last-Modified` when given) on `response`. Returns a
+    body-less 304 response when `If-None-Match` or, failing that,
+    `If-Modified-Since` shows the client's copy is still valid; otherwise
+    returns `None` and the caller sends `data` as usual.
+    """
+    headers = {"ETag": make_etag(data)}
+    modified = _parse_timestamp(last_modified) if last_modified is not None else None
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    elif modified is not None and "if-modified-since" in request.headers:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        not_modified = modified <= since
+    else:
+        not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,71 @@
+"""Cursor helpers for keyset-paginated list endpoints."""
+
+import base64
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from pydantic import TypeAdapter
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(id: int, timestamp: Optional[datetime] = None) -> str:
+    """Encode the last seen row position into an opaque cursor."""
+    raw = str(id) if timestamp is None else f"{timestamp.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor into its `(timestamp, id)` position."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        if "|" in raw:
+            timestamp, id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(timestamp), int(id)
+        return None, int(raw)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(items: Sequence, limit: int, by_timestamp: bool = False) -> Optional[str]:
+    """Cursor for the page after `items`, or `None` when this page is the last."""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.id, last.timestamp if by_timestamp else None)
+
+
+def set_cursor_header(response: Response, cursor: Optional[str]) -> None:
+    """Expose `cursor` as the next page cursor, if there is one."""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def set_next_cursor(
+    response: Response, items: Sequence, limit: int, by_timestamp: bool = False
+) -> None:
+    """Expose the cursor for the following page when this page is full."""
+    set_cursor_header(response, next_cursor(items, limit, by_timestamp))
+
+
+def page_loader(
+    fetch: Callable[[], Awaitable[Sequence[Any]]],
+    adapter: TypeAdapter[List[Any]],
+    limit: int,
+    by_timestamp: bool = False
+) -> Callable[[], Awaitable[Dict[str, Any]]]:
+    """
+    Build a cache loader for a list page, keeping its next cursor alongside the items.
+
+    `adapter` is a module-level `TypeAdapter` for the page's response list, so
+    the whole page is validated and dumped in one pydantic-core call.
+    """
+    async def load() -> Dict[str, Any]:
+        items = await fetch()
+        return {
+            "items": adapter.dump_python(
+                adapter.validate_python(items, from_attributes=True), mode="json"
+            ),
+            "next_cursor": next_cursor(items, limit, by_timestamp),
+        }
+    return load
@@ -0,0 +1,26 @@
+"""Response classes shared by the API."""
+
+from typing import Any
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def prevalidated_response(response: Response, content: Any) -> ORJSONResponse:
+    """
+    Send `content` as-is, skipping the route's response_model pass.
+
+    For payloads that were already dumped through the response schema, such
+    as cached list pages. Headers set on the endpoint's injected `response`
+    are carried over, since FastAPI does not merge them into a returned
+    Response.
+    """
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return ORJSONResponse(content, headers=headers)
@@ -1,149 +1,269 @@
 """Node Message API endpoints."""
 
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.cache import cache, row_loader
+from app.config import settings
+from app.api.conditional import conditional_response
+from app.api.responses import prevalidated_response
+from app.api.pagination import decode_cursor, page_loader, set_cursor_header, set_next_cursor
 from app.crud.node_message import node_message
 from app.crud.node_connection import node_connection
 from app.schemas.node_message import (
     NodeMessageCreate,
+    NodeMessageBulkCreate,
     NodeMessageResponse,
-    NodeMessageWithConnection
+    NodeMessageWithConnection,
+    NodeMessageListAdapter
 )
 
 router = APIRouter()
 
 
 @router.post("/", response_model=NodeMessageResponse, status_code=201)
-def create_message(
+async def create_message(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     message_in: NodeMessageCreate
 ):
     """Create a new node message."""
-    # Check if connection exists
-    connection = node_connection.get(db, id=message_in.connection_id)
-    if not connection:
+    # The connection FK is enforced by the insert itself
+    try:
+        message = await node_message.insert(db, obj_in=message_in)
+    except IntegrityError:
         raise HTTPException(status_code=404, detail="Connection not found")
-    
-    message = node_message.create(db, obj_in=message_in)
     return message
 
 
+@router.post("/bulk", response_model=List[NodeMessageResponse], status_code=201)
+async def create_messages_bulk(
+    *,
+    db: AsyncSession = Depends(get_db),
+    bulk_in: NodeMessageBulkCreate
+):
+    """Create many node messages in one transaction."""
+    connection_ids = {message.connection_id for message in bulk_in.messages}
+    missing = connection_ids - await node_connection.get_existing_ids(db, connection_ids)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Connections not found: {', '.join(map(str, sorted(missing)))}"
+        )
+    
+    try:
+        messages = await node_message.create_bulk(db, objs_in=bulk_in.messages)
+    except IntegrityError:
+        # A connection was deleted between the check and the insert
+        raise HTTPException(status_code=404, detail="Connection not found")
+    return messages
+
+
+async def _ndjson_batches(request: Request, size: int) -> AsyncIterator[List[NodeMessageCreate]]:
+    """Parse an NDJSON request body into batches of validated messages as it arrives."""
+    batch: List[NodeMessageCreate] = []
+    pending = b""
+    async for chunk in request.stream():
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                batch.append(NodeMessageCreate.model_validate_json(line))
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+    if pending.strip():
+        batch.append(NodeMessageCreate.model_validate_json(pending))
+    if batch:
+        yield batch
+
+
+@router.post("/import", status_code=201)
+async def import_messages(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import newline-delimited JSON messages (the /stream format) in one transaction.
+
+    On PostgreSQL rows are loaded with COPY, for replays and imports too large
+    for /bulk.
+    """
+    try:
+        inserted = await node_message.ingest(
+            db, batches=_ndjson_batches(request, settings.ingest_batch_size)
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+    except IntegrityError:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    return {"inserted": inserted}
+
+
 @router.get("/", response_model=List[NodeMessageResponse])
-def read_messages(
-    db: Session = Depends(get_db),
+async def read_messages(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page; overrides skip"),
     connection_id: Optional[int] = Query(None, description="Filter by connection ID"),
     message_type: Optional[str] = Query(None, description="Filter by message type"),
     hours: Optional[int] = Query(None, ge=1, le=168, description="Get messages from last N hours")
 ):
-    """Retrieve messages with optional filtering."""
-    if connection_id:
-        messages = node_message.get_by_connection(
-            db, connection_id=connection_id, skip=skip, limit=limit
-        )
-    elif message_type:
-        messages = node_message.get_by_message_type(
-            db, message_type=message_type, skip=skip, limit=limit
-        )
-    elif hours:
-        messages = node_message.get_recent_messages(
-            db, hours=hours, skip=skip, limit=limit
-        )
-    else:
-        messages = node_message.get_multi(db, skip=skip, limit=limit)
+    """Retrieve messages newest first, combining any given filters."""
+    after_ts, after_id = decode_cursor(cursor) if cursor else (None, None)
+    messages = await node_message.list(
+        db,
+        connection_id=connection_id,
+        message_type=message_type,
+        hours=hours,
+        skip=skip,
+        limit=limit,
+        after_ts=after_ts,
+        after_id=after_id
+    )
+    set_next_cursor(response, messages, limit, by_timestamp=True)
     return messages
 
 
 @router.get("/by-connection/{connection_id}", response_model=List[NodeMessageResponse])
-def read_messages_by_connection(
+async def read_messages_by_connection(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     connection_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000)
 ):
     """Retrieve messages by connection ID."""
     # Check if connection exists
-    connection = node_connection.get(db, id=connection_id)
-    if not connection:
+    if not await node_connection.exists(db, id=connection_id):
         raise HTTPException(status_code=404, detail="Connection not found")
     
-    messages = node_message.get_by_connection(
+    messages = await node_message.list(
         db, connection_id=connection_id, skip=skip, limit=limit
     )
     return messages
 
 
 @router.get("/by-type/{message_type}", response_model=List[NodeMessageResponse])
-def read_messages_by_type(
+async def read_messages_by_type(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     message_type: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000)
 ):
     """Retrieve messages by type."""
-    messages = node_message.get_by_message_type(
+    messages = await node_message.list(
         db, message_type=message_type, skip=skip, limit=limit
     )
     return messages
 
 
 @router.get("/recent", response_model=List[NodeMessageResponse])
-def read_recent_messages(
-    db: Session = Depends(get_db),
+async def read_recent_messages(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     hours: int = Query(1, ge=1, le=168, description="Hours to look back"),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page; overrides skip")
 ):
     """Retrieve recent messages."""
-    messages = node_message.get_recent_messages(
-        db, hours=hours, skip=skip, limit=limit
+    after_ts, after_id = decode_cursor(cursor) if cursor else (None, None)
+    # Dashboards poll this; results may lag by up to the short list TTL
+    page = await cache.get_or_set(
+        f"{await cache.namespace('messages:recent')}:{hours}:{skip}:{limit}:{cursor or ''}",
+        settings.list_cache_ttl,
+        page_loader(
+            lambda: node_message.get_recent_messages(
+                db, hours=hours, skip=skip, limit=limit, after_ts=after_ts, after_id=after_id
+            ),
+            NodeMessageListAdapter,
+            limit,
+            by_timestamp=True
+        )
     )
-    return messages
+    # Pollers revalidate with If-None-Match and get a body-less 304 until the page changes
+    not_modified = conditional_response(request, response, page)
+    if not_modified is not None:
+        return not_modified
+    set_cursor_header(response, page["next_cursor"])
+    return prevalidated_response(response, page["items"])
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_messages(
+    db: AsyncSession = Depends(get_db),
+    connection_id: Optional[int] = Query(None, description="Filter by connection ID"),
+    message_type: Optional[str] = Query(None, description="Filter by message type"),
+    hours: Optional[int] = Query(None, ge=1, le=168, description="Get messages from last N hours")
+):
+    """Stream every matching message as newline-delimited JSON, newest first."""
+    # Iterates `db` after the handler returns; FastAPI >= 0.118 keeps yield
+    # dependencies open until the response body has been sent
+    async def ndjson():
+        async for message in node_message.stream(
+            db, connection_id=connection_id, message_type=message_type, hours=hours
+        ):
+            yield NodeMessageResponse.model_validate(message).model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 @router.get("/{message_id}", response_model=NodeMessageResponse)
-def read_message(
+async def read_message(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     message_id: int
 ):
     """Get a specific message by ID."""
-    message = node_message.get(db, id=message_id)
-    if not message:
+    message_data = await cache.get_or_set(
+        f"message:{message_id}", settings.cache_ttl,
+        row_loader(node_message, db, message_id, NodeMessageResponse)
+    )
+    if not message_data:
         raise HTTPException(status_code=404, detail="Message not found")
-    return message
+    not_modified = conditional_response(request, response, message_data, message_data["timestamp"])
+    if not_modified is not None:
+        return not_modified
+    return message_data
 
 
 @router.get("/{message_id}/with-connection", response_model=NodeMessageWithConnection)
-def read_message_with_connection(
+async def read_message_with_connection(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     message_id: int
 ):
     """Get a message with connection information."""
-    message = node_message.get(db, id=message_id)
+    message = await node_message.get_with_connection(db, id=message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     return message
 
 
 @router.delete("/{message_id}", response_model=NodeMessageResponse)
-def delete_message(
+async def delete_message(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     message_id: int
 ):
     """Delete a message."""
-    message = node_message.get(db, id=message_id)
+    message = await node_message.get(db, id=message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     
-    message = node_message.remove(db, id=message_id)
+    message = await node_message.remove(db, id=message_id)
+    await cache.delete(f"message:{message_id}")
+    await cache.bump("messages:recent")
     return message 
\ No newline at end of file
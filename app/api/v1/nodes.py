@@ -1,10 +1,17 @@
 """Node API endpoints."""
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.cache import cache, row_loader
+from app.config import settings
+from app.api.conditional import conditional_response
+from app.api.pagination import decode_cursor, set_next_cursor
 from app.crud.node import node
+from app.crud.node_connection import node_connection
+from app.crud.node_message import node_message
 from app.crud.ros_domain import ros_domain
 from app.schemas.node import (
     NodeCreate,
@@ -17,115 +24,125 @@ router = APIRouter()
 
 
 @router.post("/", response_model=NodeResponse, status_code=201)
-def create_node(
+async def create_node(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     node_in: NodeCreate
 ):
     """Create a new node."""
-    # Check if domain exists
-    domain = ros_domain.get(db, id=node_in.domain_id)
-    if not domain:
+    # The domain FK and the (name, domain_id) unique index are enforced by the insert itself
+    try:
+        node_obj = await node.insert(db, obj_in=node_in, on_conflict=["name", "domain_id"])
+    except IntegrityError:
         raise HTTPException(status_code=404, detail="Domain not found")
     
-    # Check if node with same name already exists in the domain
-    existing_node = node.get_by_name_and_domain(
-        db, name=node_in.name, domain_id=node_in.domain_id
-    )
-    if existing_node:
+    if not node_obj:
         raise HTTPException(
             status_code=400,
             detail=f"Node with name '{node_in.name}' already exists in domain {node_in.domain_id}"
         )
-    
-    node_obj = node.create(db, obj_in=node_in)
     return node_obj
 
 
 @router.get("/", response_model=List[NodeResponse])
-def read_nodes(
-    db: Session = Depends(get_db),
+async def read_nodes(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page; overrides skip"),
     domain_id: Optional[int] = Query(None, description="Filter by domain ID"),
     node_type: Optional[str] = Query(None, description="Filter by node type"),
     status: Optional[str] = Query(None, description="Filter by status")
 ):
-    """Retrieve nodes with optional filtering."""
-    if domain_id and node_type:
-        nodes_list = node.get_by_domain_and_type(
-            db, domain_id=domain_id, node_type=node_type, skip=skip, limit=limit
-        )
-    elif domain_id:
-        nodes_list = node.get_by_domain(db, domain_id=domain_id, skip=skip, limit=limit)
-    elif node_type:
-        nodes_list = node.get_by_type(db, node_type=node_type, skip=skip, limit=limit)
-    elif status:
-        nodes_list = node.get_by_status(db, status=status, skip=skip, limit=limit)
-    else:
-        nodes_list = node.get_multi(db, skip=skip, limit=limit)
+    """Retrieve nodes, combining any given filters."""
+    after_id = decode_cursor(cursor)[1] if cursor else None
+    nodes_list = await node.list(
+        db, domain_id=domain_id, node_type=node_type, status=status,
+        skip=skip, limit=limit, after_id=after_id
+    )
+    set_next_cursor(response, nodes_list, limit)
     return nodes_list
 
 
 @router.get("/by-domain/{domain_id}", response_model=List[NodeResponse])
-def read_nodes_by_domain(
+async def read_nodes_by_domain(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     domain_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000)
 ):
     """Retrieve nodes by domain ID."""
     # Check if domain exists
-    domain = ros_domain.get(db, id=domain_id)
-    if not domain:
+    if not await ros_domain.exists(db, id=domain_id):
         raise HTTPException(status_code=404, detail="Domain not found")
     
-    nodes_list = node.get_by_domain(db, domain_id=domain_id, skip=skip, limit=limit)
+    nodes_list = await node.list(db, domain_id=domain_id, skip=skip, limit=limit)
     return nodes_list
 
 
 @router.get("/by-type/{node_type}", response_model=List[NodeResponse])
-def read_nodes_by_type(
+async def read_nodes_by_type(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     node_type: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000)
 ):
     """Retrieve nodes by type."""
-    nodes_list = node.get_by_type(db, node_type=node_type, skip=skip, limit=limit)
+    nodes_list = await node.list(db, node_type=node_type, skip=skip, limit=limit)
     return nodes_list
 
 
 @router.get("/{node_id}", response_model=NodeResponse)
-def read_node(
+async def read_node(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     node_id: int
 ):
     """Get a specific node by ID."""
-    node_obj = node.get(db, id=node_id)
+    node_data = await cache.get_or_set(
+        f"node:{node_id}", settings.cache_ttl, row_loader(node, db, node_id, NodeResponse)
+    )
+    if not node_data:
+        raise HTTPException(status_code=404, detail="Node not found")
+    not_modified = conditional_response(request, response, node_data, node_data["updated_at"])
+    if not_modified is not None:
+        return not_modified
+    return node_data
+
+
+@router.get("/{node_id}/with-domain", response_model=NodeWithDomain)
+async def read_node_with_domain(
+    *,
+    db: AsyncSession = Depends(get_db),
+    node_id: int
+):
+    """Get a node with domain information."""
+    node_obj = await node.get_with_domain(db, id=node_id)
     if not node_obj:
         raise HTTPException(status_code=404, detail="Node not found")
     return node_obj
 
 
 @router.put("/{node_id}", response_model=NodeResponse)
-def update_node(
+async def update_node(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     node_id: int,
     node_in: NodeUpdate
 ):
     """Update a node."""
-    node_obj = node.get(db, id=node_id)
+    node_obj = await node.get(db, id=node_id)
     if not node_obj:
         raise HTTPException(status_code=404, detail="Node not found")
     
     # Check if name is being updated and if it conflicts
     if node_in.name and node_in.name != node_obj.name:
-        existing_node = node.get_by_name_and_domain(
+        existing_node = await node.get_by_name_and_domain(
             db, name=node_in.name, domain_id=node_obj.domain_id
         )
         if existing_node:
@@ -134,34 +151,46 @@ def update_node(
                 detail=f"Node with name '{node_in.name}' already exists in domain {node_obj.domain_id}"
             )
     
-    node_obj = node.update(db, db_obj=node_obj, obj_in=node_in)
+    node_obj = await node.update(db, db_obj=node_obj, obj_in=node_in)
+    await cache.delete(f"node:{node_id}")
     return node_obj
 
 
 @router.patch("/{node_id}/status", response_model=NodeResponse)
-def update_node_status(
+async def update_node_status(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     node_id: int,
     status: str = Query(..., description="New status")
 ):
     """Update node status."""
-    node_obj = node.update_status(db, node_id=node_id, status=status)
+    node_obj = await node.update_status(db, node_id=node_id, status=status)
     if not node_obj:
         raise HTTPException(status_code=404, detail="Node not found")
+    await cache.delete(f"node:{node_id}")
     return node_obj
 
 
 @router.delete("/{node_id}", response_model=NodeResponse)
-def delete_node(
+async def delete_node(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     node_id: int
 ):
     """Delete a node."""
-    node_obj = node.get(db, id=node_id)
+    node_obj = await node.get(db, id=node_id)
     if not node_obj:
         raise HTTPException(status_code=404, detail="Node not found")
     
-    node_obj = node.remove(db, id=node_id)
+    # Connections and messages of the node are removed by the cascade,
+    # so collect their IDs first to invalidate just those entries
+    connection_ids = await node_connection.get_ids_by_nodes(db, node_ids=[node_id])
+    message_ids = await node_message.get_ids_by_connections(db, connection_ids=connection_ids)
+    node_obj = await node.remove(db, id=node_id)
+    await cache.delete(
+        f"node:{node_id}",
+        *(f"connection:{id}" for id in connection_ids),
+        *(f"message:{id}" for id in message_ids)
+    )
+    await cache.bump("messages:recent")
     return node_obj 
\ No newline at end of file
@@ -1,140 +1,213 @@
 """ROS Domain API endpoints."""
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.cache import cache, row_loader
+from app.config import settings
+from app.api.conditional import conditional_response
+from app.api.responses import prevalidated_response
+from app.api.pagination import decode_cursor, page_loader, set_cursor_header, set_next_cursor
+from app.crud.node import node
+from app.crud.node_connection import node_connection
+from app.crud.node_message import node_message
 from app.crud.ros_domain import ros_domain
 from app.schemas.ros_domain import (
     ROSDomainCreate,
     ROSDomainUpdate,
     ROSDomainResponse,
-    ROSDomainWithNodes
+    ROSDomainWithNodes,
+    ROSDomainListAdapter
 )
 
 router = APIRouter()
 
 
 @router.post("/", response_model=ROSDomainResponse, status_code=201)
-def create_domain(
+async def create_domain(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     domain_in: ROSDomainCreate
 ):
     """Create a new ROS domain."""
     # Check if domain with same name already exists
-    existing_domain = ros_domain.get_by_name(db, name=domain_in.name)
+    existing_domain = await ros_domain.get_by_name(db, name=domain_in.name)
     if existing_domain:
         raise HTTPException(
             status_code=400,
             detail=f"Domain with name '{domain_in.name}' already exists"
         )
     
-    domain = ros_domain.create(db, obj_in=domain_in)
+    domain = await ros_domain.create(db, obj_in=domain_in)
+    await cache.bump("domains:active")
     return domain
 
 
 @router.get("/", response_model=List[ROSDomainResponse])
-def read_domains(
-    db: Session = Depends(get_db),
+async def read_domains(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page; overrides skip"),
     status: Optional[str] = Query(None, description="Filter by agent status")
 ):
     """Retrieve domains with optional filtering."""
+    after_id = decode_cursor(cursor)[1] if cursor else None
     if status:
-        domains = ros_domain.get_by_status(db, status=status, skip=skip, limit=limit)
+        domains = await ros_domain.get_by_status(db, status=status, skip=skip, limit=limit, after_id=after_id)
     else:
-        domains = ros_domain.get_multi(db, skip=skip, limit=limit)
+        domains = await ros_domain.get_multi(db, skip=skip, limit=limit, after_id=after_id)
+    set_next_cursor(response, domains, limit)
     return domains
 
 
 @router.get("/active", response_model=List[ROSDomainResponse])
-def read_active_domains(
-    db: Session = Depends(get_db),
+async def read_active_domains(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page; overrides skip")
 ):
     """Retrieve active domains."""
-    domains = ros_domain.get_active_domains(db, skip=skip, limit=limit)
+    after_id = decode_cursor(cursor)[1] if cursor else None
+    # Dashboards poll this; serve it from a short-lived cache invalidated on domain writes
+    page = await cache.get_or_set(
+        f"{await cache.namespace('domains:active')}:{skip}:{limit}:{cursor or ''}",
+        settings.list_cache_ttl,
+        page_loader(
+            lambda: ros_domain.get_active_domains(db, skip=skip, limit=limit, after_id=after_id),
+            ROSDomainListAdapter,
+            limit
+        )
+    )
+    not_modified = conditional_response(request, response, page)
+    if not_modified is not None:
+        return not_modified
+    set_cursor_header(response, page["next_cursor"])
+    return prevalidated_response(response, page["items"])
+
+
+@router.get("/with-nodes", response_model=List[ROSDomainWithNodes])
+async def read_domains_with_nodes(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page; overrides skip"),
+    status: Optional[str] = Query(None, description="Filter by agent status")
+):
+    """Retrieve domains together with their nodes."""
+    after_id = decode_cursor(cursor)[1] if cursor else None
+    domains = await ros_domain.get_multi_with_nodes(
+        db, status=status, skip=skip, limit=limit, after_id=after_id
+    )
+    set_next_cursor(response, domains, limit)
     return domains
 
 
 @router.get("/{domain_id}", response_model=ROSDomainResponse)
-def read_domain(
+async def read_domain(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     domain_id: int
 ):
     """Get a specific domain by ID."""
-    domain = ros_domain.get(db, id=domain_id)
-    if not domain:
+    domain_data = await cache.get_or_set(
+        f"domain:{domain_id}", settings.cache_ttl,
+        row_loader(ros_domain, db, domain_id, ROSDomainResponse)
+    )
+    if not domain_data:
         raise HTTPException(status_code=404, detail="Domain not found")
-    return domain
+    not_modified = conditional_response(request, response, domain_data, domain_data["updated_at"])
+    if not_modified is not None:
+        return not_modified
+    return domain_data
 
 
 @router.get("/{domain_id}/with-nodes", response_model=ROSDomainWithNodes)
-def read_domain_with_nodes(
+async def read_domain_with_nodes(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     domain_id: int
 ):
     """Get a domain with its nodes."""
-    domain = ros_domain.get(db, id=domain_id)
+    domain = await ros_domain.get_with_nodes(db, id=domain_id)
     if not domain:
         raise HTTPException(status_code=404, detail="Domain not found")
     return domain
 
 
 @router.put("/{domain_id}", response_model=ROSDomainResponse)
-def update_domain(
+async def update_domain(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     domain_id: int,
     domain_in: ROSDomainUpdate
 ):
     """Update a domain."""
-    domain = ros_domain.get(db, id=domain_id)
+    domain = await ros_domain.get(db, id=domain_id)
     if not domain:
         raise HTTPException(status_code=404, detail="Domain not found")
     
     # Check if name is being updated and if it conflicts
     if domain_in.name and domain_in.name != domain.name:
-        existing_domain = ros_domain.get_by_name(db, name=domain_in.name)
+        existing_domain = await ros_domain.get_by_name(db, name=domain_in.name)
         if existing_domain:
             raise HTTPException(
                 status_code=400,
                 detail=f"Domain with name '{domain_in.name}' already exists"
             )
     
-    domain = ros_domain.update(db, db_obj=domain, obj_in=domain_in)
+    domain = await ros_domain.update(db, db_obj=domain, obj_in=domain_in)
+    await cache.delete(f"domain:{domain_id}")
+    await cache.bump("domains:active")
     return domain
 
 
 @router.patch("/{domain_id}/status", response_model=ROSDomainResponse)
-def update_domain_status(
+async def update_domain_status(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     domain_id: int,
     status: str = Query(..., description="New status")
 ):
     """Update domain status."""
-    domain = ros_domain.update_status(db, domain_id=domain_id, status=status)
+    domain = await ros_domain.update_status(db, domain_id=domain_id, status=status)
     if not domain:
         raise HTTPException(status_code=404, detail="Domain not found")
+    await cache.delete(f"domain:{domain_id}")
+    await cache.bump("domains:active")
     return domain
 
 
 @router.delete("/{domain_id}", response_model=ROSDomainResponse)
-def delete_domain(
+async def delete_domain(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     domain_id: int
 ):
     """Delete a domain."""
-    domain = ros_domain.get(db, id=domain_id)
+    domain = await ros_domain.get(db, id=domain_id)
     if not domain:
         raise HTTPException(status_code=404, detail="Domain not found")
     
-    domain = ros_domain.remove(db, id=domain_id)
+    # Nodes, connections and messages of the domain are removed by the cascade,
+    # so collect their IDs first to invalidate just those entries
+    node_ids = await node.get_ids_by_domain(db, domain_id=domain_id)
+    connection_ids = await node_connection.get_ids_by_nodes(db, node_ids=node_ids)
+    message_ids = await node_message.get_ids_by_connections(db, connection_ids=connection_ids)
+    domain = await ros_domain.remove(db, id=domain_id)
+    await cache.delete(
+        f"domain:{domain_id}",
+        *(f"node:{id}" for id in node_ids),
+        *(f"connection:{id}" for id in connection_ids),
+        *(f"message:{id}" for id in message_ids)
+    )
+    await cache.bump("domains:active", "messages:recent")
     return domain 
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""Redis cache-aside layer for hot reads."""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+import orjson
+from pydantic import BaseModel
+from redis import asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+# Keys per DEL, so a cascading delete doesn't build one huge command
+_DELETE_BATCH = 1000
+
+
+class Cache:
+    """
+    Cache-aside wrapper around an async Redis client.
+
+    Caching is disabled until `connect` is called with a Redis URL; every
+    lookup then goes straight to its loader. Redis errors are logged and
+    treated as misses so the cache can never fail a request.
+    """
+
+    def __init__(self):
+        self.client: Optional[aioredis.Redis] = None
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self, url: Optional[str]) -> None:
+        """Create the Redis client, or leave caching disabled when `url` is unset."""
+        if url:
+            self.client = aioredis.from_url(url)
+
+    async def close(self) -> None:
+        """Close the Redis client."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get_or_set(self, key: str, ttl: int, loader: Loader) -> Optional[Dict[str, Any]]:
+        """Return the cached value for `key`, loading and storing it on a miss."""
+        if self.client is None:
+            return await loader()
+        try:
+            cached = await self.client.get(key)
+        except aioredis.RedisError as e:
+            logger.warning("Cache read failed for %s: %s", key, e)
+            cached = None
+        if cached is not None:
+            self.hits += 1
+            return orjson.loads(cached)
+
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            try:
+                await self.client.set(key, orjson.dumps(value), ex=ttl)
+            except aioredis.RedisError as e:
+                logger.warning("Cache write failed for %s: %s", key, e)
+        return value
+
+    async def delete(self, *keys: str) -> None:
+        """Invalidate the given keys."""
+        if self.client is None or not keys:
+            return
+        try:
+            for start in range(0, len(keys), _DELETE_BATCH):
+                await self.client.delete(*keys[start:start + _DELETE_BATCH])
+        except aioredis.RedisError as e:
+            logger.warning("Cache delete failed for %d keys: %s", len(keys), e)
+
+    async def namespace(self, name: str) -> str:
+        """
+        Return the current key prefix for `name`.
+
+        Keys built on the prefix are invalidated together by `bump`, which
+        moves the prefix on; the old keys are never read again and expire
+        with their TTL.
+        """
+        if self.client is None:
+            return name
+        try:
+            generation = await self.client.get(f"{name}:generation")
+        except aioredis.RedisError as e:
+            logger.warning("Cache generation read failed for %s: %s", name, e)
+            generation = None
+        return f"{name}:{int(generation or 0)}"
+
+    async def bump(self, *names: str) -> None:
+        """Invalidate every key under the given namespaces."""
+        if self.client is None or not names:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for name in names:
+                    pipe.incr(f"{name}:generation")
+                await pipe.execute()
+        except aioredis.RedisError as e:
+            logger.warning("Cache generation bump failed for %s: %s", names, e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process."""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.client is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+def row_loader(crud: Any, db: Any, id: int, schema: Type[BaseModel]) -> Loader:
+    """Build a loader that fetches a row by ID and dumps it through `schema`."""
+    async def load() -> Optional[Dict[str, Any]]:
+        obj = await crud.get(db, id=id)
+        if obj is None:
+            return None
+        return schema.model_validate(obj).model_dump(mode="json", by_alias=True)
+    return load
+
+
+cache = Cache()
@@ -1,10 +1,19 @@
 """Base CRUD class."""
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Collection, Dict, Generic, List, Optional, Sequence, Set, Type, TypeVar, Union
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, Select, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import Base
 
+# Dialect-specific INSERT constructs that support ON CONFLICT
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
@@ -22,28 +31,127 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        """Get a single record by ID."""
-        return db.query(self.model).filter(self.model.id == id).first()
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Get a single record by ID, from the session identity map when already loaded."""
+        return await db.get(self.model, id)
+
+    async def exists(self, db: AsyncSession, *, id: Any) -> bool:
+        """Check whether a record exists without loading it."""
+        result = await db.execute(
+            select(literal(1)).select_from(self.model).where(self.model.id == id).limit(1)
+        )
+        return result.scalar() is not None
+
+    async def get_existing_ids(self, db: AsyncSession, ids: Collection[int]) -> Set[int]:
+        """Return which of `ids` exist, in a single IN query."""
+        if not ids:
+            return set()
+        result = await db.execute(select(self.model.id).where(self.model.id.in_(ids)))
+        return set(result.scalars().all())
 
-    def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
     ) -> List[ModelType]:
         """Get multiple records with pagination."""
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return await self._paginate(
+            db, select(self.model), skip=skip, limit=limit, after_id=after_id
+        )
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+    def _page(self, stmt: Select, *, skip: int, limit: int, after_id: Optional[int]) -> Select:
+        """
+        Apply id-ordered pagination to a select.
+
+        When `after_id` is given the query seeks past it on the primary key
+        (keyset pagination) and `skip` is ignored.
+        """
+        stmt = stmt.order_by(self.model.id)
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > after_id)
+        else:
+            stmt = stmt.offset(skip)
+        return stmt.limit(limit)
+
+    async def _paginate(
+        self,
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
+    ) -> List[ModelType]:
+        """Run a paginated select of model instances."""
+        result = await db.execute(self._page(stmt, skip=skip, limit=limit, after_id=after_id))
+        return list(result.scalars().all())
+
+    def _select_columns(self) -> Select:
+        """Select every column of the model's table, without ORM entities."""
+        return select(*self.model.__table__.columns)
+
+    async def _paginate_rows(
+        self,
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
+    ) -> List[Row]:
+        """
+        Run a paginated column select and return plain rows.
+
+        Rows skip ORM instance construction and identity-map bookkeeping, for
+        read-only listings that are only serialized. They support attribute
+        access, so response schemas validate them with `from_attributes`.
+        """
+        result = await db.execute(self._page(stmt, skip=skip, limit=limit, after_id=after_id))
+        return list(result.all())
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         """Create a new record."""
         obj_data = obj_in.model_dump()
         db_obj = self.model(**obj_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def insert(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: CreateSchemaType,
+        on_conflict: Optional[Sequence[str]] = None
+    ) -> Optional[ModelType]:
+        """
+        Create a new record with a single INSERT ... RETURNING round-trip.
+
+        When `on_conflict` names the columns of a unique index, a conflicting
+        row is skipped and `None` is returned instead of raising. Foreign key
+        violations are rolled back and re-raised as `IntegrityError`.
+        """
+        stmt = _DIALECT_INSERTS[db.get_bind().dialect.name](self.model).values(
+            **obj_in.model_dump()
+        )
+        if on_conflict:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(on_conflict))
+        try:
+            result = await db.execute(stmt.returning(self.model))
+            db_obj = result.scalar_one_or_none()
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
         return db_obj
 
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
@@ -58,13 +166,30 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def _update_by_id(self, db: AsyncSession, id: Any, **values: Any) -> Optional[ModelType]:
+        """
+        Set columns on one row with a single UPDATE ... RETURNING round-trip.
+
+        Returns the updated row, or `None` when no row has the given ID.
+        """
+        stmt = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        db_obj = (await db.execute(stmt)).scalar_one_or_none()
+        await db.commit()
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
+    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
         """Delete a record."""
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.commit()
         return obj 
\ No newline at end of file
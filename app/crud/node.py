@@ -1,7 +1,9 @@
 """CRUD operations for Node."""
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from app.crud.base import CRUDBase
 from app.models.node import Node
 from app.schemas.node import NodeCreate, NodeUpdate
@@ -10,65 +12,49 @@ from app.schemas.node import NodeCreate, NodeUpdate
 class CRUDNode(CRUDBase[Node, NodeCreate, NodeUpdate]):
     """CRUD operations for Node."""
 
-    def get_by_domain(self, db: Session, *, domain_id: int, skip: int = 0, limit: int = 100) -> List[Node]:
-        """Get nodes by domain ID."""
-        return (
-            db.query(Node)
-            .filter(Node.domain_id == domain_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_with_domain(self, db: AsyncSession, id: Any) -> Optional[Node]:
+        """Get a node with its domain joined in the same query."""
+        result = await db.execute(
+            select(Node).options(joinedload(Node.domain)).where(Node.id == id)
         )
-
-    def get_by_type(self, db: Session, *, node_type: str, skip: int = 0, limit: int = 100) -> List[Node]:
-        """Get nodes by type."""
-        return (
-            db.query(Node)
-            .filter(Node.node_type == node_type)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-
-    def get_by_status(self, db: Session, *, status: str, skip: int = 0, limit: int = 100) -> List[Node]:
-        """Get nodes by status."""
-        return (
-            db.query(Node)
-            .filter(Node.status == status)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-
-    def get_by_domain_and_type(
-        self, db: Session, *, domain_id: int, node_type: str, skip: int = 0, limit: int = 100
+        return result.scalars().first()
+
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        domain_id: Optional[int] = None,
+        node_type: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
     ) -> List[Node]:
-        """Get nodes by domain ID and type."""
-        return (
-            db.query(Node)
-            .filter(Node.domain_id == domain_id, Node.node_type == node_type)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-
-    def get_by_name_and_domain(self, db: Session, *, name: str, domain_id: int) -> Optional[Node]:
+        """Get nodes matching every given filter."""
+        stmt = select(Node)
+        if domain_id is not None:
+            stmt = stmt.where(Node.domain_id == domain_id)
+        if node_type is not None:
+            stmt = stmt.where(Node.node_type == node_type)
+        if status is not None:
+            stmt = stmt.where(Node.status == status)
+        return await self._paginate(db, stmt, skip=skip, limit=limit, after_id=after_id)
+
+    async def get_by_name_and_domain(self, db: AsyncSession, *, name: str, domain_id: int) -> Optional[Node]:
         """Get node by name and domain ID."""
-        return (
-            db.query(Node)
-            .filter(Node.name == name, Node.domain_id == domain_id)
-            .first()
+        result = await db.execute(
+            select(Node).where(Node.name == name, Node.domain_id == domain_id)
         )
+        return result.scalars().first()
+
+    async def get_ids_by_domain(self, db: AsyncSession, *, domain_id: int) -> List[int]:
+        """Get the IDs of a domain's nodes."""
+        result = await db.execute(select(Node.id).where(Node.domain_id == domain_id))
+        return list(result.scalars().all())
 
-    def update_status(self, db: Session, *, node_id: int, status: str) -> Optional[Node]:
+    async def update_status(self, db: AsyncSession, *, node_id: int, status: str) -> Optional[Node]:
         """Update node status."""
-        node = self.get(db, id=node_id)
-        if node:
-            node.status = status
-            db.add(node)
-            db.commit()
-            db.refresh(node)
-        return node
+        return await self._update_by_id(db, node_id, status=status)
 
 
-node = CRUDNode(Node) 
\ No newline at end of file
+node = CRUDNode(Node)
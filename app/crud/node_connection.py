@@ -1,7 +1,8 @@
 """CRUD operations for Node Connection."""
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Collection, List, Optional
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
 from app.models.node_connection import NodeConnection
 from app.schemas.node_connection import NodeConnectionCreate, NodeConnectionUpdate
@@ -10,69 +11,60 @@ from app.schemas.node_connection import NodeConnectionCreate, NodeConnectionUpda
 class CRUDNodeConnection(CRUDBase[NodeConnection, NodeConnectionCreate, NodeConnectionUpdate]):
     """CRUD operations for Node Connection."""
 
-    def get_by_source_node(self, db: Session, *, source_node_id: int, skip: int = 0, limit: int = 100) -> List[NodeConnection]:
-        """Get connections by source node ID."""
-        return (
-            db.query(NodeConnection)
-            .filter(NodeConnection.source_node_id == source_node_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-
-    def get_by_target_node(self, db: Session, *, target_node_id: int, skip: int = 0, limit: int = 100) -> List[NodeConnection]:
-        """Get connections by target node ID."""
-        return (
-            db.query(NodeConnection)
-            .filter(NodeConnection.target_node_id == target_node_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-
-    def get_by_connection_type(self, db: Session, *, connection_type: str, skip: int = 0, limit: int = 100) -> List[NodeConnection]:
-        """Get connections by type."""
-        return (
-            db.query(NodeConnection)
-            .filter(NodeConnection.connection_type == connection_type)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        source_node_id: Optional[int] = None,
+        target_node_id: Optional[int] = None,
+        connection_type: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
+    ) -> List[NodeConnection]:
+        """Get connections matching every given filter."""
+        stmt = select(NodeConnection)
+        if source_node_id is not None:
+            stmt = stmt.where(NodeConnection.source_node_id == source_node_id)
+        if target_node_id is not None:
+            stmt = stmt.where(NodeConnection.target_node_id == target_node_id)
+        if connection_type is not None:
+            stmt = stmt.where(NodeConnection.connection_type == connection_type)
+        if status is not None:
+            stmt = stmt.where(NodeConnection.status == status)
+        return await self._paginate(db, stmt, skip=skip, limit=limit, after_id=after_id)
 
-    def get_by_status(self, db: Session, *, status: str, skip: int = 0, limit: int = 100) -> List[NodeConnection]:
-        """Get connections by status."""
-        return (
-            db.query(NodeConnection)
-            .filter(NodeConnection.status == status)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-
-    def get_by_nodes(
-        self, db: Session, *, source_node_id: int, target_node_id: int, connection_type: str
+    async def get_by_nodes(
+        self, db: AsyncSession, *, source_node_id: int, target_node_id: int, connection_type: str
     ) -> Optional[NodeConnection]:
         """Get connection by source, target nodes and type."""
-        return (
-            db.query(NodeConnection)
-            .filter(
+        result = await db.execute(
+            select(NodeConnection).where(
                 NodeConnection.source_node_id == source_node_id,
                 NodeConnection.target_node_id == target_node_id,
                 NodeConnection.connection_type == connection_type
             )
-            .first()
         )
+        return result.scalars().first()
+
+    async def get_ids_by_nodes(self, db: AsyncSession, *, node_ids: Collection[int]) -> List[int]:
+        """Get the IDs of connections from or to any of the given nodes."""
+        if not node_ids:
+            return []
+        result = await db.execute(
+            select(NodeConnection.id).where(
+                or_(
+                    NodeConnection.source_node_id.in_(node_ids),
+                    NodeConnection.target_node_id.in_(node_ids)
+                )
+            )
+        )
+        return list(result.scalars().all())
 
-    def update_status(self, db: Session, *, connection_id: int, status: str) -> Optional[NodeConnection]:
+    async def update_status(self, db: AsyncSession, *, connection_id: int, status: str) -> Optional[NodeConnection]:
         """Update connection status."""
-        connection = self.get(db, id=connection_id)
-        if connection:
-            connection.status = status
-            db.add(connection)
-            db.commit()
-            db.refresh(connection)
-        return connection
+        return await self._update_by_id(db, connection_id, status=status)
 
 
 node_connection = CRUDNodeConnection(NodeConnection) 
\ No newline at end of file
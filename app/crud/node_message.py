@@ -1,71 +1,263 @@
 """CRUD operations for Node Message."""
 
-from typing import List, Optional
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterable, AsyncIterator, Collection, List, Optional, Sequence
+from datetime import datetime
+import orjson
+from sqlalchemy import DateTime, Select, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.functions import FunctionElement
 from app.crud.base import CRUDBase
+from app.models.node_connection import NodeConnection
 from app.models.node_message import NodeMessage
 from app.schemas.node_message import NodeMessageCreate, NodeMessageUpdate
 
 
+# Columns loaded by COPY; id and timestamp come from their server defaults
+_COPY_COLUMNS = ("connection_id", "message_type", "payload")
+
+
+class _hours_ago(FunctionElement):
+    """Database-side `now() - <hours> hours`, keeping `hours` a bound parameter."""
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(_hours_ago)
+def _compile_hours_ago(element, compiler, **kw):
+    return "now() - make_interval(hours => %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(_hours_ago, "sqlite")
+def _compile_hours_ago_sqlite(element, compiler, **kw):
+    return "datetime('now', printf('-%%d hours', %s))" % compiler.process(element.clauses, **kw)
+
+
 class CRUDNodeMessage(CRUDBase[NodeMessage, NodeMessageCreate, NodeMessageUpdate]):
     """CRUD operations for Node Message."""
 
-    def get_by_connection(self, db: Session, *, connection_id: int, skip: int = 0, limit: int = 100) -> List[NodeMessage]:
-        """Get messages by connection ID."""
-        return (
-            db.query(NodeMessage)
-            .filter(NodeMessage.connection_id == connection_id)
-            .order_by(NodeMessage.timestamp.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def _paginate_by_timestamp(
+        self,
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after_ts: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ) -> List[NodeMessage]:
+        """
+        Apply newest-first pagination to a message select and run it.
+
+        When `after_ts` and `after_id` are given the query seeks past the
+        `(timestamp, id)` pair (keyset pagination) and `skip` is ignored.
+        """
+        stmt = stmt.order_by(NodeMessage.timestamp.desc(), NodeMessage.id.desc())
+        if after_ts is not None and after_id is not None:
+            stmt = stmt.where(
+                tuple_(NodeMessage.timestamp, NodeMessage.id) < (after_ts, after_id)
+            )
+        else:
+            stmt = stmt.offset(skip)
+        result = await db.execute(stmt.limit(limit))
+        return list(result.scalars().all())
+
+    async def get_with_connection(self, db: AsyncSession, id: Any) -> Optional[NodeMessage]:
+        """Get a message with its connection and both endpoint nodes joined in."""
+        connection = joinedload(NodeMessage.connection)
+        result = await db.execute(
+            select(NodeMessage)
+            .options(
+                connection.joinedload(NodeConnection.source_node),
+                connection.joinedload(NodeConnection.target_node)
+            )
+            .where(NodeMessage.id == id)
         )
+        return result.scalars().first()
 
-    def get_by_message_type(self, db: Session, *, message_type: str, skip: int = 0, limit: int = 100) -> List[NodeMessage]:
-        """Get messages by type."""
-        return (
-            db.query(NodeMessage)
-            .filter(NodeMessage.message_type == message_type)
-            .order_by(NodeMessage.timestamp.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+    def _filter(
+        self,
+        *,
+        connection_id: Optional[int] = None,
+        message_type: Optional[str] = None,
+        hours: Optional[int] = None
+    ) -> Select:
+        """Build a message select that ANDs every given filter."""
+        stmt = select(NodeMessage)
+        if connection_id is not None:
+            stmt = stmt.where(NodeMessage.connection_id == connection_id)
+        if message_type is not None:
+            stmt = stmt.where(NodeMessage.message_type == message_type)
+        if hours is not None:
+            # Computed by the database so the statement is identical for every `hours`
+            stmt = stmt.where(NodeMessage.timestamp >= _hours_ago(hours))
+        return stmt
+
+    async def list(
+        self,
+        db: AsyncSession,
+        *,
+        connection_id: Optional[int] = None,
+        message_type: Optional[str] = None,
+        hours: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after_ts: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ) -> List[NodeMessage]:
+        """Get messages matching every given filter, newest first."""
+        stmt = self._filter(connection_id=connection_id, message_type=message_type, hours=hours)
+        return await self._paginate_by_timestamp(
+            db, stmt, skip=skip, limit=limit, after_ts=after_ts, after_id=after_id
         )
 
-    def get_recent_messages(self, db: Session, *, hours: int = 1, skip: int = 0, limit: int = 100) -> List[NodeMessage]:
+    async def stream(
+        self,
+        db: AsyncSession,
+        *,
+        connection_id: Optional[int] = None,
+        message_type: Optional[str] = None,
+        hours: Optional[int] = None,
+        batch_size: int = 200
+    ) -> AsyncIterator[NodeMessage]:
+        """
+        Iterate over every matching message, newest first, without loading them all.
+
+        Rows are fetched from a server-side cursor `batch_size` at a time, so
+        memory stays bounded however many messages match.
+        """
+        stmt = (
+            self._filter(connection_id=connection_id, message_type=message_type, hours=hours)
+            .order_by(NodeMessage.timestamp.desc(), NodeMessage.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream_scalars(stmt)
+        async for message in result:
+            yield message
+
+    async def get_recent_messages(
+        self,
+        db: AsyncSession,
+        *,
+        hours: int = 1,
+        skip: int = 0,
+        limit: int = 100,
+        after_ts: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ) -> List[NodeMessage]:
         """Get recent messages within specified hours."""
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        return (
-            db.query(NodeMessage)
-            .filter(NodeMessage.timestamp >= cutoff_time)
-            .order_by(NodeMessage.timestamp.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return await self.list(
+            db, hours=hours, skip=skip, limit=limit, after_ts=after_ts, after_id=after_id
         )
 
-    def get_by_timerange(
-        self, db: Session, *, start_time: datetime, end_time: datetime, skip: int = 0, limit: int = 100
+    async def get_by_timerange(
+        self,
+        db: AsyncSession,
+        *,
+        start_time: datetime,
+        end_time: datetime,
+        skip: int = 0,
+        limit: int = 100,
+        after_ts: Optional[datetime] = None,
+        after_id: Optional[int] = None
     ) -> List[NodeMessage]:
         """Get messages within a time range."""
-        return (
-            db.query(NodeMessage)
-            .filter(NodeMessage.timestamp >= start_time, NodeMessage.timestamp <= end_time)
-            .order_by(NodeMessage.timestamp.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return await self._paginate_by_timestamp(
+            db, select(NodeMessage).where(
+                NodeMessage.timestamp >= start_time, NodeMessage.timestamp <= end_time
+            ),
+            skip=skip, limit=limit, after_ts=after_ts, after_id=after_id
+        )
+
+    async def create_bulk(
+        self, db: AsyncSession, *, objs_in: Sequence[NodeMessageCreate]
+    ) -> List[NodeMessage]:
+        """
+        Insert many messages in one executemany round-trip and a single commit.
+
+        Rows are sent as batched multi-row INSERT ... RETURNING statements and
+        come back in input order. A foreign key violation rolls back the whole
+        batch and is re-raised as `IntegrityError`.
+        """
+        stmt = insert(NodeMessage).returning(NodeMessage, sort_by_parameter_order=True)
+        try:
+            result = await db.scalars(stmt, [obj_in.model_dump() for obj_in in objs_in])
+            messages = list(result.all())
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
+        return messages
+
+    async def ingest(
+        self, db: AsyncSession, *, batches: AsyncIterable[Sequence[NodeMessageCreate]]
+    ) -> int:
+        """
+        Bulk-load messages batch by batch in one transaction, without returning rows.
+
+        On asyncpg each batch is streamed with the binary COPY protocol; other
+        drivers fall back to an executemany INSERT. Any error, including a
+        foreign key violation (re-raised as `IntegrityError`), rolls back every
+        batch. Returns the number of rows loaded.
+        """
+        conn = await db.connection()
+        copy = conn.dialect.driver == "asyncpg"
+        inserted = 0
+        try:
+            async for batch in batches:
+                if not batch:
+                    continue
+                if copy:
+                    await self._copy(conn, batch)
+                else:
+                    await db.execute(insert(NodeMessage), [obj_in.model_dump() for obj_in in batch])
+                inserted += len(batch)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return inserted
+
+    async def _copy(self, conn: Any, batch: Sequence[NodeMessageCreate]) -> None:
+        """COPY a batch into node_messages over the session's asyncpg connection."""
+        from asyncpg.exceptions import IntegrityConstraintViolationError
+
+        records = [
+            (
+                obj_in.connection_id,
+                obj_in.message_type,
+                None if obj_in.payload is None else orjson.dumps(obj_in.payload).decode(),
+            )
+            for obj_in in batch
+        ]
+        raw = await conn.get_raw_connection()
+        try:
+            await raw.driver_connection.copy_records_to_table(
+                NodeMessage.__tablename__, records=records, columns=_COPY_COLUMNS
+            )
+        except IntegrityConstraintViolationError as e:
+            raise IntegrityError("COPY node_messages", None, e) from e
+
+    async def get_ids_by_connections(self, db: AsyncSession, *, connection_ids: Collection[int]) -> List[int]:
+        """Get the IDs of the given connections' messages."""
+        if not connection_ids:
+            return []
+        result = await db.execute(
+            select(NodeMessage.id).where(NodeMessage.connection_id.in_(connection_ids))
         )
+        return list(result.scalars().all())
 
-    def get_latest_message(self, db: Session, *, connection_id: int) -> Optional[NodeMessage]:
+    async def get_latest_message(self, db: AsyncSession, *, connection_id: int) -> Optional[NodeMessage]:
         """Get the latest message for a connection."""
-        return (
-            db.query(NodeMessage)
-            .filter(NodeMessage.connection_id == connection_id)
+        result = await db.execute(
+            select(NodeMessage)
+            .where(NodeMessage.connection_id == connection_id)
             .order_by(NodeMessage.timestamp.desc())
-            .first()
+            .limit(1)
         )
+        return result.scalars().first()
 
 
-node_message = CRUDNodeMessage(NodeMessage) 
\ No newline at end of file
+node_message = CRUDNodeMessage(NodeMessage)
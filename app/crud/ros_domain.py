@@ -1,7 +1,9 @@
 """CRUD operations for ROS Domain."""
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.crud.base import CRUDBase
 from app.models.ros_domain import ROSDomain
 from app.schemas.ros_domain import ROSDomainCreate, ROSDomainUpdate
@@ -10,39 +12,51 @@ from app.schemas.ros_domain import ROSDomainCreate, ROSDomainUpdate
 class CRUDROSDomain(CRUDBase[ROSDomain, ROSDomainCreate, ROSDomainUpdate]):
     """CRUD operations for ROS Domain."""
 
-    def get_by_name(self, db: Session, *, name: str) -> Optional[ROSDomain]:
+    async def get_by_name(self, db: AsyncSession, *, name: str) -> Optional[ROSDomain]:
         """Get domain by name."""
-        return db.query(ROSDomain).filter(ROSDomain.name == name).first()
-
-    def get_active_domains(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[ROSDomain]:
-        """Get active domains."""
-        return (
-            db.query(ROSDomain)
-            .filter(ROSDomain.agent_status == "active")
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        result = await db.execute(select(ROSDomain).where(ROSDomain.name == name))
+        return result.scalars().first()
 
-    def get_by_status(self, db: Session, *, status: str, skip: int = 0, limit: int = 100) -> List[ROSDomain]:
-        """Get domains by status."""
-        return (
-            db.query(ROSDomain)
-            .filter(ROSDomain.agent_status == status)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_with_nodes(self, db: AsyncSession, id: Any) -> Optional[ROSDomain]:
+        """Get a domain with its nodes loaded in one extra query."""
+        result = await db.execute(
+            select(ROSDomain).options(selectinload(ROSDomain.nodes)).where(ROSDomain.id == id)
+        )
+        return result.scalars().first()
+
+    async def get_multi_with_nodes(
+        self,
+        db: AsyncSession,
+        *,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
+    ) -> List[ROSDomain]:
+        """Get a page of domains with all their nodes loaded in one extra IN query."""
+        stmt = select(ROSDomain).options(selectinload(ROSDomain.nodes))
+        if status:
+            stmt = stmt.where(ROSDomain.agent_status == status)
+        return await self._paginate(db, stmt, skip=skip, limit=limit, after_id=after_id)
+
+    async def get_active_domains(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+    ) -> List[Row]:
+        """Get active domains as read-only rows."""
+        return await self.get_by_status(db, status="active", skip=skip, limit=limit, after_id=after_id)
+
+    async def get_by_status(
+        self, db: AsyncSession, *, status: str, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+    ) -> List[Row]:
+        """Get domains by status as read-only rows."""
+        return await self._paginate_rows(
+            db, self._select_columns().where(ROSDomain.agent_status == status),
+            skip=skip, limit=limit, after_id=after_id
         )
 
-    def update_status(self, db: Session, *, domain_id: int, status: str) -> Optional[ROSDomain]:
+    async def update_status(self, db: AsyncSession, *, domain_id: int, status: str) -> Optional[ROSDomain]:
         """Update domain status."""
-        domain = self.get(db, id=domain_id)
-        if domain:
-            domain.agent_status = status
-            db.add(domain)
-            db.commit()
-            db.refresh(domain)
-        return domain
+        return await self._update_by_id(db, domain_id, agent_status=status)
 
 
 ros_domain = CRUDROSDomain(ROSDomain) 
\ No newline at end of file
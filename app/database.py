@@ -1,29 +1,72 @@
 """Database configuration and session management."""
 
-from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.pool import NullPool
 from app.config import settings
 
-# Create database engine
-engine = create_engine(
+# asyncpg prepares each statement once per connection and reuses it, so
+# Postgres keeps the parsed plan for the CRUD layer's repeated filter queries
+connect_args = {}
+if make_url(settings.database_url).get_driver_name() == "asyncpg":
+    connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+
+# Behind PgBouncer in transaction mode the bouncer owns the pool, so open a
+# connection per checkout instead of holding idle ones per worker
+if settings.db_null_pool:
+    pool_args = {"poolclass": NullPool}
+else:
+    pool_args = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+# Create async database engine (asyncpg driver)
+engine = create_async_engine(
     settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.debug
+    connect_args=connect_args,
+    query_cache_size=settings.db_query_cache_size,
+    insertmanyvalues_page_size=settings.db_insertmanyvalues_page_size,
+    echo=settings.debug,
+    **pool_args
 )
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Rows written with INSERT/UPDATE ... RETURNING are already current after
+# commit, and lazy refreshes are not possible on an AsyncSession, so don't
+# expire them on commit.
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Create base class for models
 Base = declarative_base()
 
 
-def get_db():
+@event.listens_for(Session, "do_orm_execute")
+def _strict_loading(orm_execute_state):
+    """
+    Add `raiseload("*")` to top-level ORM selects when strict loading is on.
+
+    Relationships a query does not eager-load explicitly then raise on access
+    instead of silently emitting one query per row.
+    """
+    if (
+        settings.debug_strict_loading
+        and orm_execute_state.is_select
+        and not orm_execute_state.is_column_load
+        and not orm_execute_state.is_relationship_load
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+async def get_db():
     """Get database session."""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
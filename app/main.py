@@ -1,13 +1,30 @@
 """Main FastAPI application."""
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import api_router
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.responses import ORJSONResponse
+from app.cache import cache
 from app.config import settings
 from app.database import engine, Base
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up the database and cache on startup and release them on shutdown."""
+    # Every worker runs this, so production leaves AUTO_CREATE_TABLES off and migrates instead
+    if settings.auto_create_tables:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    cache.connect(settings.redis_url)
+    try:
+        yield
+    finally:
+        await cache.close()
+        await engine.dispose()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -15,16 +32,22 @@ app = FastAPI(
     description="ROS Domain Management Backend API",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
+# Explicit lists let preflights be answered from precomputed sets, and
+# max_age lets browsers skip repeating them for a day
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure this properly for production
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match", "If-Modified-Since"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
+    max_age=settings.cors_max_age,
 )
 
 # Include API routes
@@ -48,11 +71,20 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/meta/cache-stats")
+async def cache_stats():
+    """Cache hit/miss counters for this worker."""
+    return cache.stats()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        workers=settings.workers,
+        loop=settings.loop,
+        http=settings.http
     ) 
\ No newline at end of file
@@ -1,8 +1,9 @@
 """Node model."""
 
-from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import JSONType
 
 
 class Node(Base):
@@ -14,8 +15,10 @@ class Node(Base):
     name = Column(String(255), nullable=False, index=True)
     domain_id = Column(Integer, ForeignKey("ros_domains.id", ondelete="CASCADE"), nullable=False, index=True)
     node_type = Column(String(50), nullable=False)  # 'topic', 'service', 'action'
-    status = Column(String(50), default="inactive", index=True)
-    metadata = Column(JSON, default={})
+    status = Column(String(50), default="inactive")
+    # `metadata` is reserved on declarative classes; keep the column name, rename the attribute.
+    # The database fills in the empty default, so no per-row Python callback runs on INSERT.
+    metadata_ = Column("metadata", JSONType, nullable=False, server_default=text("'{}'"))
     created_at = Column(DateTime, default=func.current_timestamp())
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
     
@@ -34,5 +37,13 @@ class Node(Base):
         cascade="all, delete-orphan"
     )
     
+    # Indexes aligned with the CRUD filter paths
+    __table_args__ = (
+        Index("ix_nodes_name_domain", "name", "domain_id", unique=True),
+        Index("ix_nodes_domain_type", "domain_id", "node_type"),
+        Index("ix_nodes_domain_status", "domain_id", "status"),
+        Index("ix_nodes_status_id", "status", "id"),
+    )
+    
     def __repr__(self):
         return f"<Node(id={self.id}, name='{self.name}', type='{self.node_type}', status='{self.status}')>" 
\ No newline at end of file
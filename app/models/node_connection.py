@@ -1,8 +1,9 @@
 """Node Connection model."""
 
-from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import JSONType
 
 
 class NodeConnection(Base):
@@ -15,7 +16,7 @@ class NodeConnection(Base):
     target_node_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), nullable=False, index=True)
     connection_type = Column(String(50), nullable=False)  # 'publisher', 'subscriber', 'client', 'server'
     status = Column(String(50), default="active", index=True)
-    metadata = Column(JSON, default={})
+    metadata_ = Column("metadata", JSONType, nullable=False, server_default=text("'{}'"))
     created_at = Column(DateTime, default=func.current_timestamp())
     
     # Relationships
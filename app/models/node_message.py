@@ -1,8 +1,9 @@
 """Node Message model."""
 
-from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import JSONType
 
 
 class NodeMessage(Base):
@@ -13,11 +14,28 @@ class NodeMessage(Base):
     id = Column(Integer, primary_key=True, index=True)
     connection_id = Column(Integer, ForeignKey("node_connections.id", ondelete="CASCADE"), nullable=False, index=True)
     message_type = Column(String(100))
-    payload = Column(JSON)
-    timestamp = Column(DateTime, default=func.current_timestamp(), index=True)
+    payload = Column(JSONType)
+    # Partition key on PostgreSQL (monthly ranges, see migration 0004); the
+    # table's primary key there is (id, timestamp), ids stay unique via the sequence
+    timestamp = Column(
+        DateTime, nullable=False,
+        default=func.current_timestamp(), server_default=func.current_timestamp()
+    )
     
     # Relationships
     connection = relationship("NodeConnection", back_populates="messages")
     
+    # Indexes aligned with the newest-first (timestamp, id) list queries
+    __table_args__ = (
+        Index("ix_msg_conn_ts", connection_id, timestamp.desc(), id.desc()),
+        Index("ix_msg_type_ts", message_type, timestamp.desc(), id.desc()),
+        # Containment / key-existence filters on payload (@>, ?)
+        Index("ix_msg_payload_gin", payload, postgresql_using="gin"),
+        Index(
+            "ix_msg_ts_brin", timestamp,
+            postgresql_using="brin", postgresql_with={"pages_per_range": 32}
+        ),
+    )
+    
     def __repr__(self):
         return f"<NodeMessage(id={self.id}, connection_id={self.connection_id}, type='{self.message_type}')>" 
\ No newline at end of file
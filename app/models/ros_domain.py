@@ -1,6 +1,6 @@
 """ROS Domain model."""
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, func, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -13,12 +13,17 @@ class ROSDomain(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, unique=True, index=True)
     description = Column(Text)
-    agent_status = Column(String(50), default="inactive", index=True)
+    agent_status = Column(String(50), default="inactive")
     created_at = Column(DateTime, default=func.current_timestamp())
     updated_at = Column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
     
     # Relationships
     nodes = relationship("Node", back_populates="domain", cascade="all, delete-orphan")
     
+    # Status listings page in id order; (agent_status, id) serves them as an ordered index scan
+    __table_args__ = (
+        Index("ix_ros_domains_status_id", "agent_status", "id"),
+    )
+    
     def __repr__(self):
         return f"<ROSDomain(id={self.id}, name='{self.name}', status='{self.agent_status}')>" 
\ No newline at end of file
@@ -0,0 +1,7 @@
+"""Column types shared by the models."""
+
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Binary JSONB on PostgreSQL (no reparse on read, GIN-indexable); plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
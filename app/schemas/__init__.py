@@ -1,14 +1,21 @@
 """Pydantic schemas for request/response models."""
 
-from .ros_domain import ROSDomainCreate, ROSDomainUpdate, ROSDomainResponse
+from .ros_domain import ROSDomainCreate, ROSDomainUpdate, ROSDomainResponse, ROSDomainListAdapter
 from .node import NodeCreate, NodeUpdate, NodeResponse
 from .node_connection import NodeConnectionCreate, NodeConnectionUpdate, NodeConnectionResponse
-from .node_message import NodeMessageCreate, NodeMessageUpdate, NodeMessageResponse
+from .node_message import (
+    NodeMessageCreate,
+    NodeMessageBulkCreate,
+    NodeMessageUpdate,
+    NodeMessageResponse,
+    NodeMessageListAdapter
+)
 
 __all__ = [
     "ROSDomainCreate",
     "ROSDomainUpdate", 
     "ROSDomainResponse",
+    "ROSDomainListAdapter",
     "NodeCreate",
     "NodeUpdate",
     "NodeResponse",
@@ -16,6 +23,8 @@ __all__ = [
     "NodeConnectionUpdate",
     "NodeConnectionResponse",
     "NodeMessageCreate",
+    "NodeMessageBulkCreate",
     "NodeMessageUpdate",
-    "NodeMessageResponse"
+    "NodeMessageResponse",
+    "NodeMessageListAdapter"
 ] 
\ No newline at end of file
@@ -1,6 +1,6 @@
 """Node schemas."""
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, AliasPath, BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -11,7 +11,11 @@ class NodeBase(BaseModel):
     domain_id: int = Field(..., gt=0, description="Domain ID")
     node_type: str = Field(..., description="Node type: topic, service, or action")
     status: str = Field("inactive", description="Node status")
-    metadata: Dict[str, Any] = Field(default_factory=dict, description="Node metadata")
+    metadata_: Dict[str, Any] = Field(
+        default_factory=dict,
+        validation_alias=AliasChoices("metadata_", "metadata"), serialization_alias="metadata",
+        description="Node metadata"
+    )
 
 
 class NodeCreate(NodeBase):
@@ -24,7 +28,10 @@ class NodeUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     node_type: Optional[str] = None
     status: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
+    # Omit to keep the current value; the column is NOT NULL, so null is rejected
+    metadata_: Dict[str, Any] = Field(
+        None, validation_alias=AliasChoices("metadata_", "metadata"), serialization_alias="metadata"
+    )
 
 
 class NodeResponse(NodeBase):
@@ -33,14 +40,16 @@ class NodeResponse(NodeBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class NodeWithDomain(NodeResponse):
     """Schema for node with domain information."""
-    domain_name: Optional[str] = None
-    domain_status: Optional[str] = None
+    domain_name: Optional[str] = Field(
+        None, validation_alias=AliasChoices("domain_name", AliasPath("domain", "name"))
+    )
+    domain_status: Optional[str] = Field(
+        None, validation_alias=AliasChoices("domain_status", AliasPath("domain", "agent_status"))
+    )
     
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
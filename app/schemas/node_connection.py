@@ -1,6 +1,6 @@
 """Node Connection schemas."""
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -11,7 +11,11 @@ class NodeConnectionBase(BaseModel):
     target_node_id: int = Field(..., gt=0, description="Target node ID")
     connection_type: str = Field(..., description="Connection type: publisher, subscriber, client, server")
     status: str = Field("active", description="Connection status")
-    metadata: Dict[str, Any] = Field(default_factory=dict, description="Connection metadata")
+    metadata_: Dict[str, Any] = Field(
+        default_factory=dict,
+        validation_alias=AliasChoices("metadata_", "metadata"), serialization_alias="metadata",
+        description="Connection metadata"
+    )
 
 
 class NodeConnectionCreate(NodeConnectionBase):
@@ -23,7 +27,10 @@ class NodeConnectionUpdate(BaseModel):
     """Schema for updating a node connection."""
     connection_type: Optional[str] = None
     status: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
+    # Omit to keep the current value; the column is NOT NULL, so null is rejected
+    metadata_: Dict[str, Any] = Field(
+        None, validation_alias=AliasChoices("metadata_", "metadata"), serialization_alias="metadata"
+    )
 
 
 class NodeConnectionResponse(NodeConnectionBase):
@@ -31,8 +38,7 @@ class NodeConnectionResponse(NodeConnectionBase):
     id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class NodeConnectionWithNodes(NodeConnectionResponse):
@@ -42,5 +48,4 @@ class NodeConnectionWithNodes(NodeConnectionResponse):
     source_domain_name: Optional[str] = None
     target_domain_name: Optional[str] = None
     
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
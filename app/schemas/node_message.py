@@ -1,7 +1,7 @@
 """Node Message schemas."""
 
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from pydantic import AliasChoices, AliasPath, BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
@@ -17,6 +17,11 @@ class NodeMessageCreate(NodeMessageBase):
     pass
 
 
+class NodeMessageBulkCreate(BaseModel):
+    """Schema for creating many node messages at once."""
+    messages: List[NodeMessageCreate] = Field(..., min_length=1, max_length=1000)
+
+
 class NodeMessageUpdate(BaseModel):
     """Schema for updating a node message."""
     message_type: Optional[str] = Field(None, max_length=100)
@@ -28,15 +33,26 @@ class NodeMessageResponse(NodeMessageBase):
     id: int
     timestamp: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class NodeMessageWithConnection(NodeMessageResponse):
     """Schema for node message with connection information."""
-    source_node_name: Optional[str] = None
-    target_node_name: Optional[str] = None
-    connection_type: Optional[str] = None
+    source_node_name: Optional[str] = Field(
+        None,
+        validation_alias=AliasChoices("source_node_name", AliasPath("connection", "source_node", "name"))
+    )
+    target_node_name: Optional[str] = Field(
+        None,
+        validation_alias=AliasChoices("target_node_name", AliasPath("connection", "target_node", "name"))
+    )
+    connection_type: Optional[str] = Field(
+        None,
+        validation_alias=AliasChoices("connection_type", AliasPath("connection", "connection_type"))
+    )
     
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Built once at import: validates and dumps whole pages in one pydantic-core call
+NodeMessageListAdapter = TypeAdapter(List[NodeMessageResponse])
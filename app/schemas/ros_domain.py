@@ -1,8 +1,9 @@
 """ROS Domain schemas."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
+from .node import NodeResponse
 
 
 class ROSDomainBase(BaseModel):
@@ -30,13 +31,15 @@ class ROSDomainResponse(ROSDomainBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ROSDomainWithNodes(ROSDomainResponse):
     """Schema for ROS domain with nodes."""
-    nodes: List["NodeResponse"] = []
+    nodes: List[NodeResponse] = []
     
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Built once at import: validates and dumps whole pages in one pydantic-core call
+ROSDomainListAdapter = TypeAdapter(List[ROSDomainResponse])
@@ -0,0 +1,25 @@
+"""
+Cached wall clock for per-message timestamps.
+
+Messages and topic counters stamp every publish; `now()` hands out one
+shared `datetime` until the monotonic clock has moved on by `RESOLUTION`
+seconds, instead of building a new one per call.
+"""
+
+import time
+from datetime import datetime
+
+RESOLUTION = 0.001  # Seconds a cached timestamp is reused for
+
+_cached = datetime.utcnow()
+_cached_at = time.monotonic()
+
+
+def now() -> datetime:
+    """Current UTC time, accurate to within RESOLUTION"""
+    global _cached, _cached_at
+    current = time.monotonic()
+    if current - _cached_at >= RESOLUTION:
+        _cached = datetime.utcnow()
+        _cached_at = current
+    return _cached
@@ -35,6 +35,8 @@ class BrokerSettings(BaseSettings):
     max_message_size: int = 268435455  # 256MB
     max_inflight_messages: int = 20
     max_queued_messages: int = 100
+    write_buffer_high: int = 256 * 1024  # Transport write buffer high-water mark
+    write_buffer_low: int = 64 * 1024
     
     # ROS Integration Settings
     ros_domain_prefix: str = "ros/"
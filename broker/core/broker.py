@@ -1,11 +1,11 @@
 import asyncio
 import logging
 import ssl
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, FrozenSet, Iterator
 from ..config import settings
 from .session_manager import SessionManager
 from .topic_manager import TopicManager
-from .protocol import MQTTProtocol
+from .protocol import MQTTProtocol, encode_publish_header, read_packet
 from ..models.message import Message
 
 logger = logging.getLogger(__name__)
@@ -22,7 +22,7 @@ class MQTTBroker:
         self.running = False
         
         # Set up message routing
-        self.topic_manager.add_message_handler(self._handle_message)
+        self.topic_manager.set_dispatcher(self._dispatch_message)
     
     async def start(self):
         """Start the MQTT broker"""
@@ -126,14 +126,14 @@ class MQTTBroker:
             protocol = MQTTProtocol(self)
             protocol.connection_made(transport)
             
-            # Set up data handling
+            # Set up data handling: one readexactly per packet body
             async def handle_data():
                 try:
                     while True:
-                        data = await reader.read(1024)
-                        if not data:
+                        packet = await read_packet(reader)
+                        if packet is None:
                             break
-                        protocol.data_received(data)
+                        protocol.packet_received(*packet)
                 except Exception as e:
                     logger.error(f"Error handling MQTT data: {e}")
                 finally:
@@ -156,30 +156,33 @@ class MQTTBroker:
                 try:
                     # Parse WebSocket message as MQTT
                     # This is simplified - you'd need proper MQTT over WebSocket handling
-                    logger.debug(f"WebSocket message: {message}")
+                    logger.debug("WebSocket message: %s", message)
                 except Exception as e:
                     logger.error(f"Error handling WebSocket message: {e}")
         except Exception as e:
             logger.error(f"WebSocket connection error: {e}")
     
-    def _handle_message(self, message: Message):
-        """Handle incoming messages"""
+    def _dispatch_message(self, message: Message, subscribers: FrozenSet[str]):
+        """Send a published message to the subscribers publish_message matched"""
         try:
-            # Route message to subscribers
-            subscribers = self.topic_manager.publish_message(message)
+            # Subscriber QoS from exact and wildcard subscriptions, looked up once
+            subscription_qos = self.topic_manager.get_subscription_qos(message.topic) if message.qos else None
+            clients = self.session_manager.clients
+            # QoS 0 deliveries share one header; QoS > 0 ones each carry their own message ID
+            header = encode_publish_header(message.topic, len(message.payload))
             
             # Send message to each subscriber
             for client_id in subscribers:
-                client = self.session_manager.get_client(client_id)
+                client = clients.get(client_id)
                 if client and client.connected and client.protocol:
-                    # Get QoS for this client
-                    topic = self.topic_manager.get_or_create_topic(message.topic)
-                    qos = topic.get_subscriber_qos(client_id)
+                    # Deliver at the lower of the published and subscribed QoS
+                    qos = min(message.qos, subscription_qos.get(client_id, 0)) if subscription_qos else 0
                     
                     # Send message
-                    client.protocol.send_message(message, qos)
+                    client.protocol.send_message(message, qos, header)
             
-            logger.debug(f"Message routed to {len(subscribers)} subscribers")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Message routed to %d subscribers", len(subscribers))
             
         except Exception as e:
             logger.error(f"Error handling message: {e}")
@@ -218,6 +221,10 @@ class MQTTBroker:
         """Get information about all clients"""
         return self.session_manager.get_all_clients_info()
     
+    def iter_clients_info(self, iso: bool = True) -> Iterator[Dict[str, Any]]:
+        """Iterate over information about all clients"""
+        return self.session_manager.iter_clients_info(iso)
+    
     def get_topic_info(self, topic_name: str) -> Optional[Dict[str, Any]]:
         """Get information about a topic"""
         return self.topic_manager.get_topic_info(topic_name)
@@ -1,7 +1,8 @@
 import asyncio
 import logging
 import struct
-from typing import Optional, Dict, Any
+import sys
+from typing import Optional, Dict, Any, Tuple
 from ..models.message import Message
 from ..models.client import Client
 from ..config import settings
@@ -9,6 +10,121 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 
+MAX_REMAINING_LENGTH = 268435455  # Largest value four varint bytes can carry
+
+# Single-byte encodings, which cover nearly every control packet
+_SMALL_REMAINING_LENGTHS = tuple(bytes((i,)) for i in range(128))
+
+
+def encode_remaining_length(length: int) -> bytes:
+    """Encode an MQTT remaining length as its 1-4 byte variable-length integer"""
+    if length < 128:
+        return _SMALL_REMAINING_LENGTHS[length]
+    if length > MAX_REMAINING_LENGTH:
+        raise ValueError(f"Remaining length {length} exceeds MQTT maximum")
+    encoded = bytearray()
+    while length > 0x7F:
+        encoded.append((length & 0x7F) | 0x80)
+        length >>= 7
+    encoded.append(length)
+    return bytes(encoded)
+
+
+_UINT16 = struct.Struct('!H')
+# CONNECT variable header after the protocol name: level, flags, keepalive
+_CONNECT_FIELDS = struct.Struct('!BBH')
+# Two-byte-body acks: packet type byte, remaining length 2, message ID
+_ACK = struct.Struct('!BBH')
+
+# Fixed control packets, built once instead of packed per send
+_PINGRESP = b'\xd0\x00'
+_CONNACK = {
+    return_code: bytes((0x20, 0x02, 0x00, return_code))
+    for return_code in (0x00, 0x01, 0x02, 0x03, 0x04, 0x05)
+}
+
+
+def read_uint16(packet: bytes, offset: int) -> Tuple[int, int]:
+    """Read a big-endian two-byte integer, returning it and the next offset"""
+    return _UINT16.unpack_from(packet, offset)[0], offset + 2
+
+
+def read_string(packet: bytes, offset: int) -> Tuple[str, int]:
+    """Read a length-prefixed UTF-8 string, returning it and the next offset"""
+    length = _UINT16.unpack_from(packet, offset)[0]
+    end = offset + 2 + length
+    return str(packet[offset + 2:end], 'utf-8'), end
+
+
+# Decoded topic names keyed by their wire bytes; cleared when full
+_TOPIC_CACHE: Dict[bytes, str] = {}
+_TOPIC_CACHE_SIZE = 4096
+
+
+def read_topic(packet: bytes, offset: int) -> Tuple[str, int]:
+    """
+    Read a length-prefixed topic name, returning it and the next offset.
+
+    Repeated topics come back as the same interned `str`, skipping UTF-8
+    decoding and letting topic lookups compare by identity.
+    """
+    length = _UINT16.unpack_from(packet, offset)[0]
+    end = offset + 2 + length
+    raw = bytes(packet[offset + 2:end])
+    topic = _TOPIC_CACHE.get(raw)
+    if topic is None:
+        if len(_TOPIC_CACHE) >= _TOPIC_CACHE_SIZE:
+            _TOPIC_CACHE.clear()
+        topic = _TOPIC_CACHE[raw] = sys.intern(str(raw, 'utf-8'))
+    return topic, end
+
+
+def encode_publish_header(topic: str, payload_length: int, qos: int = 0, message_id: Optional[int] = None) -> bytearray:
+    """Build a PUBLISH fixed and variable header for a payload of `payload_length` bytes"""
+    topic_bytes = topic.encode('utf-8')
+    remaining_length = 2 + len(topic_bytes) + payload_length
+    if qos > 0:
+        remaining_length += 2  # Message ID
+    
+    header = bytearray((0x30 | (qos << 1),))
+    header += encode_remaining_length(remaining_length)
+    header += _UINT16.pack(len(topic_bytes))
+    header += topic_bytes
+    if qos > 0:
+        header += _UINT16.pack(message_id)
+    return header
+
+
+async def read_packet(reader: asyncio.StreamReader) -> Optional[Tuple[int, bytes]]:
+    """
+    Read one MQTT packet from `reader`.
+
+    Reads the type byte and the first length byte together, any further
+    length bytes one at a time, then the body with a single `readexactly`,
+    so no partial frame is ever buffered or re-parsed.
+    Returns `(fixed_header_byte, body)`, or `None` once the peer closes the
+    connection. Raises ValueError for a malformed remaining length or one
+    over `max_message_size`, before any of the body is read.
+    """
+    try:
+        # Every packet has at least these two bytes, and most lengths fit in one
+        header, byte = await reader.readexactly(2)
+        length = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            if shift > 21:
+                raise ValueError("Malformed remaining length")
+            byte = (await reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+        if length > settings.max_message_size:
+            raise ValueError(f"Packet of {length} bytes exceeds max_message_size")
+        body = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        return None
+    return header, body
+
+
 class MQTTProtocol(asyncio.Protocol):
     """MQTT Protocol implementation"""
     
@@ -32,91 +148,59 @@ class MQTTProtocol(asyncio.Protocol):
         self.broker = broker
         self.transport = None
         self.client: Optional[Client] = None
-        self.buffer = bytearray()
-        self.keepalive_task: Optional[asyncio.Task] = None
+        self.flags = 0  # Low nibble of the current packet's fixed header
+        self.keepalive_handle: Optional[asyncio.TimerHandle] = None
+        # Handlers indexed by packet type (the fixed header's high nibble), bound once per connection
+        self._dispatch = (
+            None, self._handle_connect, None, self._handle_publish,
+            None, None, None, None,
+            self._handle_subscribe, None, self._handle_unsubscribe, None,
+            self._handle_pingreq, None, self._handle_disconnect, None
+        )
         
     def connection_made(self, transport):
         """Called when a connection is established"""
         self.transport = transport
+        # Let PUBLISH fan-out queue up before writes start pushing back
+        transport.set_write_buffer_limits(high=settings.write_buffer_high, low=settings.write_buffer_low)
         logger.info(f"New connection from {transport.get_extra_info('peername')}")
     
     def connection_lost(self, exc):
         """Called when a connection is lost"""
         if self.client:
             self.broker.session_manager.disconnect_client(self.client.client_id, "Connection lost")
-        if self.keepalive_task:
-            self.keepalive_task.cancel()
+        if self.keepalive_handle:
+            self.keepalive_handle.cancel()
         logger.info("Connection lost")
     
-    def data_received(self, data):
-        """Called when data is received"""
-        self.buffer.extend(data)
-        
-        while len(self.buffer) >= 2:
-            # Parse fixed header
-            packet_type = (self.buffer[0] >> 4) & 0x0F
-            remaining_length = self.buffer[1]
-            
-            if remaining_length == 0x7F:
-                # Extended length
-                if len(self.buffer) < 4:
-                    return
-                remaining_length = struct.unpack('!I', self.buffer[2:6])[0]
-                header_length = 6
-            else:
-                header_length = 2
-            
-            packet_length = header_length + remaining_length
-            
-            if len(self.buffer) < packet_length:
-                return
-            
-            # Extract packet
-            packet = self.buffer[:packet_length]
-            self.buffer = self.buffer[packet_length:]
-            
-            # Process packet
-            try:
-                self._handle_packet(packet_type, packet)
-            except Exception as e:
-                logger.error(f"Error handling packet: {e}")
+    def packet_received(self, fixed_byte: int, body: bytes):
+        """Dispatch one complete packet; `body` excludes the fixed header"""
+        try:
+            self.flags = fixed_byte & 0x0F
+            self._handle_packet((fixed_byte >> 4) & 0x0F, body)
+        except Exception as e:
+            logger.error(f"Error handling packet: {e}")
     
     def _handle_packet(self, packet_type: int, packet: bytes):
         """Handle different packet types"""
-        if packet_type == self.CONNECT:
-            self._handle_connect(packet)
-        elif packet_type == self.PUBLISH:
-            self._handle_publish(packet)
-        elif packet_type == self.SUBSCRIBE:
-            self._handle_subscribe(packet)
-        elif packet_type == self.UNSUBSCRIBE:
-            self._handle_unsubscribe(packet)
-        elif packet_type == self.PINGREQ:
-            self._handle_pingreq(packet)
-        elif packet_type == self.DISCONNECT:
-            self._handle_disconnect(packet)
+        handler = self._dispatch[packet_type]
+        if handler is None:
+            logger.warning("Unsupported packet type: %d", packet_type)
         else:
-            logger.warning(f"Unsupported packet type: {packet_type}")
+            handler(packet)
     
     def _handle_connect(self, packet: bytes):
         """Handle CONNECT packet"""
         try:
             # Parse CONNECT packet
-            offset = 2  # Skip fixed header
+            offset = 0  # Fixed header already stripped
             
             # Protocol name
-            protocol_name_length = struct.unpack('!H', packet[offset:offset+2])[0]
-            offset += 2
-            protocol_name = packet[offset:offset+protocol_name_length].decode('utf-8')
-            offset += protocol_name_length
+            protocol_name, offset = read_string(packet, offset)
             
-            # Protocol level
-            protocol_level = packet[offset]
-            offset += 1
-            
-            # Connect flags
-            connect_flags = packet[offset]
-            offset += 1
+            # Protocol level, connect flags and keep alive
+            protocol_level, connect_flags, keepalive = _CONNECT_FIELDS.unpack_from(packet, offset)
+            offset += _CONNECT_FIELDS.size
             
             clean_session = bool(connect_flags & 0x02)
             will_flag = bool(connect_flags & 0x04)
@@ -125,44 +209,25 @@ class MQTTProtocol(asyncio.Protocol):
             password_flag = bool(connect_flags & 0x40)
             username_flag = bool(connect_flags & 0x80)
             
-            # Keep alive
-            keepalive = struct.unpack('!H', packet[offset:offset+2])[0]
-            offset += 2
-            
-            # Client ID
-            client_id_length = struct.unpack('!H', packet[offset:offset+2])[0]
-            offset += 2
-            client_id = packet[offset:offset+client_id_length].decode('utf-8')
-            offset += client_id_length
+            # Client ID; interned, as it keys sessions and every subscriber set
+            client_id, offset = read_string(packet, offset)
+            client_id = sys.intern(client_id)
             
             # Will topic and message
             will_topic = None
             will_message = None
             if will_flag:
-                will_topic_length = struct.unpack('!H', packet[offset:offset+2])[0]
-                offset += 2
-                will_topic = packet[offset:offset+will_topic_length].decode('utf-8')
-                offset += will_topic_length
-                
-                will_message_length = struct.unpack('!H', packet[offset:offset+2])[0]
-                offset += 2
-                will_message = packet[offset:offset+will_message_length].decode('utf-8')
-                offset += will_message_length
+                will_topic, offset = read_string(packet, offset)
+                will_message, offset = read_string(packet, offset)
             
             # Username and password
             username = None
             password = None
             if username_flag:
-                username_length = struct.unpack('!H', packet[offset:offset+2])[0]
-                offset += 2
-                username = packet[offset:offset+username_length].decode('utf-8')
-                offset += username_length
+                username, offset = read_string(packet, offset)
             
             if password_flag:
-                password_length = struct.unpack('!H', packet[offset:offset+2])[0]
-                offset += 2
-                password = packet[offset:offset+password_length].decode('utf-8')
-                offset += password_length
+                password, offset = read_string(packet, offset)
             
             # Authenticate client
             if not self.broker.session_manager.authenticate_client(client_id, username, password):
@@ -187,9 +252,11 @@ class MQTTProtocol(asyncio.Protocol):
                 self._send_connack(0x02)  # Identifier rejected
                 return
             
-            # Start keepalive task
+            # Schedule keepalive checks
             if keepalive > 0:
-                self.keepalive_task = asyncio.create_task(self._keepalive_loop(keepalive))
+                self.keepalive_handle = asyncio.get_running_loop().call_later(
+                    keepalive, self._keepalive_check, keepalive
+                )
             
             # Send CONNACK
             self._send_connack(0x00)  # Connection accepted
@@ -207,29 +274,29 @@ class MQTTProtocol(asyncio.Protocol):
         
         try:
             # Parse PUBLISH packet
-            offset = 2  # Skip fixed header
+            offset = 0  # Fixed header already stripped
+            
+            # QoS and retain come from the fixed header flags
+            qos = (self.flags >> 1) & 0x03
+            retain = bool(self.flags & 0x01)
             
             # Topic
-            topic_length = struct.unpack('!H', packet[offset:offset+2])[0]
-            offset += 2
-            topic = packet[offset:offset+topic_length].decode('utf-8')
-            offset += topic_length
+            topic, offset = read_topic(packet, offset)
             
             # Message ID (for QoS > 0)
             message_id = None
-            if self.client.qos > 0:
-                message_id = struct.unpack('!H', packet[offset:offset+2])[0]
-                offset += 2
+            if qos > 0:
+                message_id, offset = read_uint16(packet, offset)
             
-            # Payload
-            payload = packet[offset:]
+            # Payload: a view onto the packet body rather than a second copy
+            payload = memoryview(packet)[offset:]
             
             # Create message
             message = Message(
                 topic=topic,
                 payload=payload,
-                qos=self.client.qos,
-                retain=self.client.will_retain,
+                qos=qos,
+                retain=retain,
                 client_id=self.client.client_id
             )
             
@@ -237,12 +304,13 @@ class MQTTProtocol(asyncio.Protocol):
             subscribers = self.broker.topic_manager.publish_message(message)
             
             # Send acknowledgments
-            if self.client.qos == 1:
+            if qos == 1:
                 self._send_puback(message_id)
-            elif self.client.qos == 2:
+            elif qos == 2:
                 self._send_pubrec(message_id)
             
-            logger.debug(f"Message published to {len(subscribers)} subscribers")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Message published to %d subscribers", len(subscribers))
             
         except Exception as e:
             logger.error(f"Error handling PUBLISH: {e}")
@@ -254,19 +322,15 @@ class MQTTProtocol(asyncio.Protocol):
         
         try:
             # Parse SUBSCRIBE packet
-            offset = 2  # Skip fixed header
+            offset = 0  # Fixed header already stripped
             
             # Message ID
-            message_id = struct.unpack('!H', packet[offset:offset+2])[0]
-            offset += 2
+            message_id, offset = read_uint16(packet, offset)
             
             # Topic filters and QoS
             topics = []
             while offset < len(packet):
-                topic_length = struct.unpack('!H', packet[offset:offset+2])[0]
-                offset += 2
-                topic = packet[offset:offset+topic_length].decode('utf-8')
-                offset += topic_length
+                topic, offset = read_topic(packet, offset)
                 qos = packet[offset] & 0x03
                 offset += 1
                 topics.append((topic, qos))
@@ -290,19 +354,15 @@ class MQTTProtocol(asyncio.Protocol):
         
         try:
             # Parse UNSUBSCRIBE packet
-            offset = 2  # Skip fixed header
+            offset = 0  # Fixed header already stripped
             
             # Message ID
-            message_id = struct.unpack('!H', packet[offset:offset+2])[0]
-            offset += 2
+            message_id, offset = read_uint16(packet, offset)
             
             # Topic filters
             topics = []
             while offset < len(packet):
-                topic_length = struct.unpack('!H', packet[offset:offset+2])[0]
-                offset += 2
-                topic = packet[offset:offset+topic_length].decode('utf-8')
-                offset += topic_length
+                topic, offset = read_topic(packet, offset)
                 topics.append(topic)
             
             # Unsubscribe from topics
@@ -319,7 +379,8 @@ class MQTTProtocol(asyncio.Protocol):
         """Handle PINGREQ packet"""
         self._send_pingresp()
         if self.client:
-            self.broker.session_manager.update_client_activity(self.client.client_id)
+            # The protocol already holds its Client; no manager lookup needed
+            self.client.update_last_seen()
     
     def _handle_disconnect(self, packet: bytes):
         """Handle DISCONNECT packet"""
@@ -329,86 +390,70 @@ class MQTTProtocol(asyncio.Protocol):
     
     def _send_connack(self, return_code: int):
         """Send CONNACK packet"""
-        packet = struct.pack('!BB', 0x20, 0x02) + struct.pack('!BB', 0x00, return_code)
-        self.transport.write(packet)
+        self.transport.write(_CONNACK[return_code])
     
     def _send_puback(self, message_id: int):
         """Send PUBACK packet"""
-        packet = struct.pack('!BBH', 0x40, 0x02, message_id)
-        self.transport.write(packet)
+        self.transport.write(_ACK.pack(0x40, 0x02, message_id))
     
     def _send_pubrec(self, message_id: int):
         """Send PUBREC packet"""
-        packet = struct.pack('!BBH', 0x50, 0x02, message_id)
-        self.transport.write(packet)
+        self.transport.write(_ACK.pack(0x50, 0x02, message_id))
     
     def _send_suback(self, message_id: int, return_codes: list):
         """Send SUBACK packet"""
-        payload = struct.pack('!H', message_id) + bytes(return_codes)
-        packet = struct.pack('!BB', 0x90, len(payload)) + payload
+        remaining_length = encode_remaining_length(2 + len(return_codes))
+        offset = 1 + len(remaining_length)
+        # Fill one exact-size buffer rather than concatenating intermediates
+        packet = bytearray(offset + 2 + len(return_codes))
+        packet[0] = 0x90
+        packet[1:offset] = remaining_length
+        _UINT16.pack_into(packet, offset, message_id)
+        packet[offset + 2:] = bytes(return_codes)
         self.transport.write(packet)
     
     def _send_unsuback(self, message_id: int):
         """Send UNSUBACK packet"""
-        packet = struct.pack('!BBH', 0xB0, 0x02, message_id)
-        self.transport.write(packet)
+        self.transport.write(_ACK.pack(0xB0, 0x02, message_id))
     
     def _send_pingresp(self):
         """Send PINGRESP packet"""
-        packet = struct.pack('!BB', 0xD0, 0x00)
-        self.transport.write(packet)
+        self.transport.write(_PINGRESP)
     
-    def send_message(self, message: Message, qos: int = 0):
-        """Send a message to the client"""
+    def send_message(self, message: Message, qos: int = 0, header: Optional[bytes] = None):
+        """
+        Send a message to the client
+
+        Fan-out passes the QoS 0 `header` built once by `encode_publish_header`
+        so it is not rebuilt for every subscriber.
+        """
         if not self.transport:
             return
         
         try:
-            # Build PUBLISH packet
-            topic_bytes = message.topic.encode('utf-8')
-            topic_length = len(topic_bytes)
-            
-            # Fixed header
-            packet_type = 0x30  # PUBLISH
-            remaining_length = 2 + topic_length + len(message.payload)
-            if qos > 0:
-                remaining_length += 2  # Message ID
-            
-            if remaining_length < 128:
-                fixed_header = struct.pack('!BB', packet_type, remaining_length)
-            else:
-                # Extended length
-                fixed_header = struct.pack('!BI', packet_type, remaining_length)
-            
-            # Variable header
-            variable_header = struct.pack('!H', topic_length) + topic_bytes
-            if qos > 0:
-                message_id = self.broker.session_manager.get_next_message_id()
-                variable_header += struct.pack('!H', message_id)
+            if qos > 0 or header is None:
+                message_id = self.broker.session_manager.get_next_message_id() if qos > 0 else None
+                header = encode_publish_header(message.topic, len(message.payload), qos, message_id)
             
-            # Payload
-            payload = message.payload
-            
-            # Send packet
-            packet = fixed_header + variable_header + payload
-            self.transport.write(packet)
+            # Send packet; the payload is handed over as-is instead of copied into the header
+            self.transport.writelines((header, message.payload))
             
         except Exception as e:
             logger.error(f"Error sending message: {e}")
     
-    async def _keepalive_loop(self, keepalive: int):
-        """Keepalive loop"""
-        while True:
-            try:
-                await asyncio.sleep(keepalive)
-                if self.client and self.client.connected:
-                    # Check if client is still active
-                    if self.client.is_idle(keepalive * 2):
-                        logger.info(f"Client {self.client.client_id} timed out")
-                        self.broker.session_manager.disconnect_client(self.client.client_id, "Keepalive timeout")
-                        break
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in keepalive loop: {e}")
-                break 
\ No newline at end of file
+    def _keepalive_check(self, keepalive: int):
+        """Keepalive check, rescheduled as a timer rather than run as a task per client"""
+        self.keepalive_handle = None
+        try:
+            if not (self.client and self.client.connected):
+                return
+            # Check if client is still active
+            if self.client.is_idle(keepalive * 2):
+                logger.info(f"Client {self.client.client_id} timed out")
+                self.broker.session_manager.disconnect_client(self.client.client_id, "Keepalive timeout")
+                return
+            self.keepalive_handle = asyncio.get_running_loop().call_later(
+                keepalive, self._keepalive_check, keepalive
+            )
+        except Exception as e:
+            logger.error(f"Error in keepalive check: {e}") 
\ No newline at end of file
@@ -1,6 +1,8 @@
 import asyncio
+import hmac
 import logging
-from typing import Dict, Optional, List
+import time
+from typing import Dict, Iterator, Optional, List, Set
 from datetime import datetime, timedelta
 from ..models.client import Client
 from ..config import settings
@@ -13,8 +15,15 @@ class SessionManager:
     
     def __init__(self):
         self.clients: Dict[str, Client] = {}
+        # Maintained on connect/disconnect so lookups and statistics never scan every session
+        self._connected: Set[str] = set()
+        self._counts: Dict[str, int] = {'subscriptions': 0, 'inflight': 0, 'queued': 0}
         self.next_message_id = 1
         self.cleanup_task: Optional[asyncio.Task] = None
+        # Credentials are read once; compared as UTF-8 bytes in constant time
+        self._auth_enabled = settings.enable_auth
+        self._username = (settings.username or '').encode('utf-8')
+        self._password = (settings.password or '').encode('utf-8')
         
     async def start(self):
         """Start the session manager"""
@@ -37,25 +46,32 @@ class SessionManager:
             logger.warning(f"Client {client_id} already exists, reusing existing session")
             return self.clients[client_id]
         
-        client = Client(client_id=client_id, **kwargs)
+        client = Client(client_id=client_id, on_count_change=self._count_change, **kwargs)
         self.clients[client_id] = client
         logger.info(f"Created new client session: {client_id}")
         return client
     
+    def _count_change(self, counter: str, delta: int):
+        """Apply a client's collection size change to the running totals"""
+        self._counts[counter] += delta
+    
     def get_client(self, client_id: str) -> Optional[Client]:
         """Get a client by ID"""
         return self.clients.get(client_id)
     
     def authenticate_client(self, client_id: str, username: str = None, password: str = None) -> bool:
         """Authenticate a client"""
-        if not settings.enable_auth:
+        if not self._auth_enabled:
             return True
         
         if not username or not password:
             logger.warning(f"Authentication failed for client {client_id}: missing credentials")
             return False
         
-        if username != settings.username or password != settings.password:
+        # Evaluate both comparisons so timing does not reveal which one failed
+        username_ok = hmac.compare_digest(username.encode('utf-8'), self._username)
+        password_ok = hmac.compare_digest(password.encode('utf-8'), self._password)
+        if not (username_ok & password_ok):
             logger.warning(f"Authentication failed for client {client_id}: invalid credentials")
             return False
         
@@ -75,6 +91,7 @@ class SessionManager:
             return False
         
         client.connect(transport, protocol)
+        self._connected.add(client_id)
         logger.info(f"Client {client_id} connected")
         return True
     
@@ -86,12 +103,17 @@ class SessionManager:
             return
         
         client.disconnect()
+        self._connected.discard(client_id)
         logger.info(f"Client {client_id} disconnected: {reason}")
     
     def remove_client(self, client_id: str):
         """Remove a client session"""
         if client_id in self.clients:
-            del self.clients[client_id]
+            client = self.clients.pop(client_id)
+            self._connected.discard(client_id)
+            self._counts['subscriptions'] -= len(client.subscriptions)
+            self._counts['inflight'] -= len(client.inflight_messages)
+            self._counts['queued'] -= len(client.queued_messages)
             logger.info(f"Removed client session: {client_id}")
     
     def update_client_activity(self, client_id: str):
@@ -102,7 +124,7 @@ class SessionManager:
     
     def get_connected_clients(self) -> List[Client]:
         """Get all connected clients"""
-        return [client for client in self.clients.values() if client.connected]
+        return [self.clients[client_id] for client_id in self._connected]
     
     def get_client_count(self) -> int:
         """Get total number of clients"""
@@ -110,47 +132,57 @@ class SessionManager:
     
     def get_connected_client_count(self) -> int:
         """Get number of connected clients"""
-        return len(self.get_connected_clients())
+        return len(self._connected)
     
     def get_next_message_id(self) -> int:
         """Get next available message ID"""
         message_id = self.next_message_id
-        self.next_message_id = (self.next_message_id % 65535) + 1
+        # Wrap 65535 back to 1; 0 is not a valid packet identifier
+        self.next_message_id = message_id + 1 if message_id != 0xFFFF else 1
         return message_id
     
     def is_client_connected(self, client_id: str) -> bool:
         """Check if a client is connected"""
-        client = self.get_client(client_id)
-        return client is not None and client.connected
-    
-    def get_client_info(self, client_id: str) -> Optional[dict]:
-        """Get client information"""
-        client = self.get_client(client_id)
-        if not client:
-            return None
-        
+        return client_id in self._connected
+    
+    @staticmethod
+    def _client_info(client: Client, iso: bool) -> dict:
+        """Build the info dict for a client; `iso=False` leaves timestamps as datetimes"""
+        connected_at, last_seen = client.connected_at, client.last_seen
+        if iso:
+            connected_at = connected_at.isoformat() if connected_at else None
+            last_seen = last_seen.isoformat() if last_seen else None
         return {
             'client_id': client.client_id,
             'username': client.username,
             'connected': client.connected,
-            'connected_at': client.connected_at.isoformat() if client.connected_at else None,
-            'last_seen': client.last_seen.isoformat() if client.last_seen else None,
+            'connected_at': connected_at,
+            'last_seen': last_seen,
             'subscriptions': list(client.subscriptions),
             'inflight_messages': len(client.inflight_messages),
             'queued_messages': len(client.queued_messages),
         }
     
-    def get_all_clients_info(self) -> List[dict]:
+    def get_client_info(self, client_id: str, iso: bool = True) -> Optional[dict]:
+        """Get client information"""
+        client = self.get_client(client_id)
+        if not client:
+            return None
+        return self._client_info(client, iso)
+    
+    def iter_clients_info(self, iso: bool = True) -> Iterator[dict]:
+        """Yield information about each client without building the full list"""
+        for client in self.clients.values():
+            yield self._client_info(client, iso)
+    
+    def get_all_clients_info(self, iso: bool = True) -> List[dict]:
         """Get information about all clients"""
-        return [self.get_client_info(client_id) for client_id in self.clients.keys()]
+        return list(self.iter_clients_info(iso))
     
     def get_idle_clients(self, timeout_seconds: int = 300) -> List[str]:
         """Get list of idle client IDs"""
-        idle_clients = []
-        for client_id, client in self.clients.items():
-            if client.is_idle(timeout_seconds):
-                idle_clients.append(client_id)
-        return idle_clients
+        cutoff = time.monotonic() - timeout_seconds
+        return [client_id for client_id, client in self.clients.items() if client.last_activity < cutoff]
     
     async def _cleanup_loop(self):
         """Background task to clean up idle clients"""
@@ -166,26 +198,21 @@ class SessionManager:
     async def _cleanup_idle_clients(self):
         """Clean up idle clients"""
         idle_timeout = 300  # 5 minutes
-        idle_clients = self.get_idle_clients(idle_timeout)
+        # Only connected clients can be disconnected, so skip the rest of the sessions
+        cutoff = time.monotonic() - idle_timeout
+        idle_clients = [client.client_id for client in self.get_connected_clients() if client.last_activity < cutoff]
         
         for client_id in idle_clients:
-            client = self.get_client(client_id)
-            if client and client.connected:
-                logger.info(f"Disconnecting idle client: {client_id}")
-                client.disconnect()
+            logger.info(f"Disconnecting idle client: {client_id}")
+            self.disconnect_client(client_id, "Idle timeout")
     
     def get_statistics(self) -> dict:
         """Get session manager statistics"""
-        connected_clients = self.get_connected_clients()
-        total_subscriptions = sum(len(client.subscriptions) for client in self.clients.values())
-        total_inflight = sum(len(client.inflight_messages) for client in self.clients.values())
-        total_queued = sum(len(client.queued_messages) for client in self.clients.values())
-        
         return {
             'total_clients': len(self.clients),
-            'connected_clients': len(connected_clients),
-            'total_subscriptions': total_subscriptions,
-            'total_inflight_messages': total_inflight,
-            'total_queued_messages': total_queued,
+            'connected_clients': len(self._connected),
+            'total_subscriptions': self._counts['subscriptions'],
+            'total_inflight_messages': self._counts['inflight'],
+            'total_queued_messages': self._counts['queued'],
             'next_message_id': self.next_message_id,
         } 
\ No newline at end of file
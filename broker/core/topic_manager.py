@@ -1,10 +1,12 @@
 import asyncio
 import logging
-from typing import Dict, Set, List, Optional, Callable
+import sys
+from typing import Dict, FrozenSet, Set, List, Optional, Callable
 from ..models.topic import Topic
 from ..models.message import Message
-from ..models.subscription import Subscription
 from ..config import settings
+from .topic_trie import TopicTrie
+from ..matching import compile_pattern, topic_matches
 
 logger = logging.getLogger(__name__)
 
@@ -15,22 +17,76 @@ class TopicManager:
     def __init__(self):
         self.topics: Dict[str, Topic] = {}
         self.wildcard_subscriptions: Dict[str, Set[str]] = {}  # pattern -> set of client_ids
+        self.wildcard_trie = TopicTrie()  # Same patterns, indexed for matching
+        self._compiled_patterns: Dict[str, tuple] = {}  # pattern -> (parts, hash_prefix)
+        self._client_subs: Dict[str, Set[str]] = {}  # client_id -> its topics and patterns
+        self._empty_candidates: Set[str] = set()  # Topics that may have neither subscribers nor a retained message
+        # Running totals for get_statistics, kept in step with every subscription and retain change
+        self._counts: Dict[str, int] = {'subscribers': 0, 'wildcard_subscribers': 0, 'retained': 0}
         self.message_handlers: List[Callable[[Message], None]] = []
+        # Handlers taking every message published during one loop iteration at once
+        self.batch_handlers: List[Callable[[List[Message]], None]] = []
+        self._pending: List[Message] = []
+        # Delivers each published message to the subscribers matched for it
+        self.dispatcher: Optional[Callable[[Message, FrozenSet[str]], None]] = None
+        # Read once; settings are final by the time the broker is built
+        self.ros_integration = settings.enable_ros_integration
         
-    def add_message_handler(self, handler: Callable[[Message], None]):
-        """Add a message handler for processing messages"""
-        self.message_handlers.append(handler)
+    def set_dispatcher(self, dispatcher: Optional[Callable[[Message, FrozenSet[str]], None]]):
+        """
+        Set the callback delivering published messages
+
+        It is called with each message and its matched subscribers, so
+        delivery reuses the match made by publish_message.
+        """
+        self.dispatcher = dispatcher
+    
+    def add_message_handler(self, handler: Callable, batched: bool = False):
+        """
+        Add a message handler for processing messages
+
+        A `batched` handler is called with a list of the messages published
+        since its last call, once per event loop iteration.
+        """
+        if batched:
+            self.batch_handlers.append(handler)
+        else:
+            self.message_handlers.append(handler)
     
-    def remove_message_handler(self, handler: Callable[[Message], None]):
+    def remove_message_handler(self, handler: Callable):
         """Remove a message handler"""
         if handler in self.message_handlers:
             self.message_handlers.remove(handler)
+        if handler in self.batch_handlers:
+            self.batch_handlers.remove(handler)
+    
+    def _queue_for_batch_handlers(self, message: Message):
+        """Collect a message for the batched handlers, scheduling a flush on the first one"""
+        self._pending.append(message)
+        if len(self._pending) == 1:
+            try:
+                asyncio.get_running_loop().call_soon(self._flush_batch_handlers)
+            except RuntimeError:
+                # Outside the event loop there is no later tick to wait for
+                self._flush_batch_handlers()
+    
+    def _flush_batch_handlers(self):
+        """Hand the collected messages to each batched handler"""
+        messages, self._pending = self._pending, []
+        for handler in self.batch_handlers:
+            try:
+                handler(messages)
+            except Exception as e:
+                logger.error(f"Error in batch message handler: {e}")
     
     def get_or_create_topic(self, topic_name: str) -> Topic:
         """Get existing topic or create new one"""
         if topic_name not in self.topics:
+            # Names off the wire are interned already; this covers API publishes and subscribes
+            topic_name = sys.intern(topic_name)
             self.topics[topic_name] = Topic(name=topic_name)
-            logger.debug(f"Created new topic: {topic_name}")
+            self._empty_candidates.add(topic_name)
+            logger.debug("Created new topic: %s", topic_name)
         return self.topics[topic_name]
     
     def subscribe(self, client_id: str, topic_pattern: str, qos: int = 0) -> bool:
@@ -40,13 +96,22 @@ class TopicManager:
             if self._is_wildcard_pattern(topic_pattern):
                 if topic_pattern not in self.wildcard_subscriptions:
                     self.wildcard_subscriptions[topic_pattern] = set()
-                self.wildcard_subscriptions[topic_pattern].add(client_id)
-                logger.info(f"Client {client_id} subscribed to wildcard pattern: {topic_pattern}")
+                    self._compiled_patterns[topic_pattern] = compile_pattern(topic_pattern)
+                clients = self.wildcard_subscriptions[topic_pattern]
+                if client_id not in clients:
+                    clients.add(client_id)
+                    self._counts['wildcard_subscribers'] += 1
+                self.wildcard_trie.insert(topic_pattern, client_id, qos)
+                self._client_subs.setdefault(client_id, set()).add(topic_pattern)
+                logger.info(f"Client {client_id} subscribed to wildcard pattern: {topic_pattern} with QoS {qos}")
                 return True
             
             # Handle exact topic subscription
             topic = self.get_or_create_topic(topic_pattern)
+            if not topic.has_subscriber(client_id):
+                self._counts['subscribers'] += 1
             topic.add_subscriber(client_id, qos)
+            self._client_subs.setdefault(client_id, set()).add(topic_pattern)
             logger.info(f"Client {client_id} subscribed to topic: {topic_pattern} with QoS {qos}")
             return True
             
@@ -57,55 +122,112 @@ class TopicManager:
     def unsubscribe(self, client_id: str, topic_pattern: str) -> bool:
         """Unsubscribe a client from a topic pattern"""
         try:
-            # Handle wildcard subscriptions
-            if topic_pattern in self.wildcard_subscriptions:
-                self.wildcard_subscriptions[topic_pattern].discard(client_id)
-                if not self.wildcard_subscriptions[topic_pattern]:
-                    del self.wildcard_subscriptions[topic_pattern]
-                logger.info(f"Client {client_id} unsubscribed from wildcard pattern: {topic_pattern}")
-                return True
-            
-            # Handle exact topic subscription
-            if topic_pattern in self.topics:
-                self.topics[topic_pattern].remove_subscriber(client_id)
-                logger.info(f"Client {client_id} unsubscribed from topic: {topic_pattern}")
-                return True
+            subscriptions = self._client_subs.get(client_id)
+            if subscriptions is not None:
+                subscriptions.discard(topic_pattern)
+                if not subscriptions:
+                    del self._client_subs[client_id]
             
-            return False
+            removed = self._remove_subscription(client_id, topic_pattern)
+            if removed:
+                logger.info(f"Client {client_id} unsubscribed from: {topic_pattern}")
+            return removed
             
         except Exception as e:
             logger.error(f"Error unsubscribing client {client_id} from {topic_pattern}: {e}")
             return False
     
-    def publish_message(self, message: Message) -> List[str]:
-        """Publish a message to all matching subscribers"""
-        subscribers = set()
+    def _remove_subscription(self, client_id: str, topic_pattern: str) -> bool:
+        """Drop one subscription from the topic or wildcard structures"""
+        # Handle wildcard subscriptions
+        if topic_pattern in self.wildcard_subscriptions:
+            clients = self.wildcard_subscriptions[topic_pattern]
+            if client_id in clients:
+                clients.discard(client_id)
+                self._counts['wildcard_subscribers'] -= 1
+            if not clients:
+                del self.wildcard_subscriptions[topic_pattern]
+                self._compiled_patterns.pop(topic_pattern, None)
+            self.wildcard_trie.remove(topic_pattern, client_id)
+            return True
+        
+        # Handle exact topic subscription
+        topic = self.topics.get(topic_pattern)
+        if topic is not None:
+            if topic.has_subscriber(client_id):
+                self._counts['subscribers'] -= 1
+            topic.remove_subscriber(client_id)
+            if not topic.has_subscribers():
+                self._empty_candidates.add(topic_pattern)
+            return True
         
+        return False
+    
+    def get_subscribers(self, topic_name: str) -> FrozenSet[str]:
+        """Get the client IDs whose exact or wildcard subscriptions match a topic"""
+        # Both sources hand out immutable snapshots, returned as-is when only one applies
+        topic = self.topics.get(topic_name)
+        exact = topic.subscribers if topic is not None else frozenset()
+        if not self.wildcard_subscriptions:
+            return exact
+        wildcard = self.wildcard_trie.match(topic_name)
+        if not exact:
+            return wildcard
+        return exact | wildcard
+    
+    def get_subscription_qos(self, topic_name: str) -> Dict[str, int]:
+        """
+        Get each matching subscriber's QoS for a topic
+
+        A client matched by several subscriptions gets the highest QoS among
+        them. The result may be shared and must not be modified.
+        """
+        topic = self.topics.get(topic_name)
+        exact = topic.subscription_qos if topic is not None else {}
+        if not self.wildcard_subscriptions:
+            return exact
+        wildcard = self.wildcard_trie.match_qos(topic_name)
+        if not exact:
+            return wildcard
+        merged = dict(wildcard)
+        for client_id, qos in exact.items():
+            if merged.get(client_id, -1) < qos:
+                merged[client_id] = qos
+        return merged
+    
+    def publish_message(self, message: Message) -> FrozenSet[str]:
+        """Publish a message to all matching subscribers"""
         try:
             # Extract ROS info if enabled
-            if settings.enable_ros_integration:
+            if self.ros_integration:
                 message.extract_ros_info()
             
-            # Find exact topic subscribers
+            subscribers = self.get_subscribers(message.topic)
+            
             if message.topic in self.topics:
                 topic = self.topics[message.topic]
-                subscribers.update(topic.get_subscribers_list())
                 
                 # Handle retained messages
                 if message.retain:
                     if message.payload:  # Set retained message
+                        if not topic.has_retained_message():
+                            self._counts['retained'] += 1
                         topic.set_retained_message(message)
-                        logger.debug(f"Set retained message for topic: {message.topic}")
+                        logger.debug("Set retained message for topic: %s", message.topic)
                     else:  # Clear retained message
+                        if topic.has_retained_message():
+                            self._counts['retained'] -= 1
                         topic.clear_retained_message()
-                        logger.debug(f"Cleared retained message for topic: {message.topic}")
+                        self._empty_candidates.add(message.topic)
+                        logger.debug("Cleared retained message for topic: %s", message.topic)
                 else:
                     topic.increment_message_count()
             
-            # Find wildcard subscribers
-            for pattern, client_ids in self.wildcard_subscriptions.items():
-                if self._topic_matches_pattern(message.topic, pattern):
-                    subscribers.update(client_ids)
+            if self.dispatcher is not None and subscribers:
+                try:
+                    self.dispatcher(message, subscribers)
+                except Exception as e:
+                    logger.error(f"Error dispatching message: {e}")
             
             # Call message handlers
             for handler in self.message_handlers:
@@ -113,13 +235,16 @@ class TopicManager:
                     handler(message)
                 except Exception as e:
                     logger.error(f"Error in message handler: {e}")
+            if self.batch_handlers:
+                self._queue_for_batch_handlers(message)
             
-            logger.debug(f"Message published to {len(subscribers)} subscribers on topic: {message.topic}")
-            return list(subscribers)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Message published to %d subscribers on topic: %s", len(subscribers), message.topic)
+            return subscribers
             
         except Exception as e:
             logger.error(f"Error publishing message to topic {message.topic}: {e}")
-            return []
+            return frozenset()
     
     def get_retained_message(self, topic_name: str) -> Optional[Message]:
         """Get retained message for a topic"""
@@ -139,31 +264,13 @@ class TopicManager:
     
     def get_client_subscriptions(self, client_id: str) -> List[str]:
         """Get all topics a client is subscribed to"""
-        subscriptions = []
-        
-        # Check exact topic subscriptions
-        for topic in self.topics.values():
-            if client_id in topic.subscribers:
-                subscriptions.append(topic.name)
-        
-        # Check wildcard subscriptions
-        for pattern, client_ids in self.wildcard_subscriptions.items():
-            if client_id in client_ids:
-                subscriptions.append(pattern)
-        
-        return subscriptions
+        return list(self._client_subs.get(client_id, ()))
     
     def remove_client_subscriptions(self, client_id: str):
         """Remove all subscriptions for a client"""
-        # Remove from exact topics
-        for topic in self.topics.values():
-            topic.remove_subscriber(client_id)
-        
-        # Remove from wildcard subscriptions
-        for pattern in list(self.wildcard_subscriptions.keys()):
-            self.wildcard_subscriptions[pattern].discard(client_id)
-            if not self.wildcard_subscriptions[pattern]:
-                del self.wildcard_subscriptions[pattern]
+        # Only this client's own topics and patterns are visited
+        for topic_pattern in self._client_subs.pop(client_id, ()):
+            self._remove_subscription(client_id, topic_pattern)
         
         logger.info(f"Removed all subscriptions for client: {client_id}")
     
@@ -173,30 +280,27 @@ class TopicManager:
     
     def _topic_matches_pattern(self, topic: str, pattern: str) -> bool:
         """Check if a topic matches a wildcard pattern"""
-        sub = Subscription(topic=pattern)
-        return sub.matches_topic(topic)
+        # Subscribed patterns are compiled once in subscribe
+        compiled = self._compiled_patterns.get(pattern) or compile_pattern(pattern)
+        parts, hash_prefix = compiled
+        return topic_matches(parts, tuple(topic.split('/')), hash_prefix)
     
     def cleanup_empty_topics(self):
         """Remove topics with no subscribers and no retained messages"""
-        empty_topics = []
-        for topic_name, topic in self.topics.items():
-            if not topic.has_subscribers() and not topic.has_retained_message():
-                empty_topics.append(topic_name)
-        
-        for topic_name in empty_topics:
-            del self.topics[topic_name]
-            logger.debug(f"Removed empty topic: {topic_name}")
+        # Only topics that lost their last subscriber or retained message can be empty
+        candidates, self._empty_candidates = self._empty_candidates, set()
+        for topic_name in candidates:
+            topic = self.topics.get(topic_name)
+            if topic is not None and not topic.has_subscribers() and not topic.has_retained_message():
+                del self.topics[topic_name]
+                logger.debug("Removed empty topic: %s", topic_name)
     
     def get_statistics(self) -> dict:
         """Get broker statistics"""
-        total_subscribers = sum(len(topic.subscribers) for topic in self.topics.values())
-        total_retained_messages = sum(1 for topic in self.topics.values() if topic.has_retained_message())
-        total_wildcard_subscriptions = sum(len(clients) for clients in self.wildcard_subscriptions.values())
-        
         return {
             'total_topics': len(self.topics),
-            'total_subscribers': total_subscribers + total_wildcard_subscriptions,
-            'total_retained_messages': total_retained_messages,
+            'total_subscribers': self._counts['subscribers'] + self._counts['wildcard_subscribers'],
+            'total_retained_messages': self._counts['retained'],
             'wildcard_subscriptions': len(self.wildcard_subscriptions),
-            'message_handlers': len(self.message_handlers),
+            'message_handlers': len(self.message_handlers) + len(self.batch_handlers),
         } 
\ No newline at end of file
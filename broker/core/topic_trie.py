@@ -0,0 +1,137 @@
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+MATCH_CACHE_SIZE = 4096  # Topic names whose match results are kept
+
+
+class TrieNode:
+    """One topic level in a TopicTrie"""
+
+    __slots__ = ('children', 'plus', 'hash', 'subscribers')
+
+    def __init__(self):
+        self.children: Dict[str, 'TrieNode'] = {}
+        self.plus: Optional['TrieNode'] = None  # '+' single-level wildcard
+        self.hash: Optional['TrieNode'] = None  # '#' multi-level wildcard
+        self.subscribers: Dict[str, int] = {}  # client_id -> subscribed QoS
+
+    def is_empty(self) -> bool:
+        """Check if the node holds no subscribers and no children"""
+        return not (self.subscribers or self.children or self.plus or self.hash)
+
+
+class TopicTrie:
+    """
+    Topic filters indexed by level, with dedicated '+' and '#' slots.
+
+    Matching a topic walks its levels once, so the cost depends on the topic
+    depth and the branching of matching filters rather than on how many
+    filters are subscribed. Results are cached per topic name until the
+    next insert or remove, so a topic published to repeatedly is matched once.
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+        # topic -> (matching client IDs, each client's highest subscribed QoS)
+        self._match_cache: Dict[str, Tuple[FrozenSet[str], Dict[str, int]]] = {}
+
+    def insert(self, pattern: str, client_id: str, qos: int = 0):
+        """Add or update a client's subscription to a topic filter"""
+        self._match_cache.clear()
+        node = self.root
+        for level in pattern.split('/'):
+            if level == '+':
+                if node.plus is None:
+                    node.plus = TrieNode()
+                node = node.plus
+            elif level == '#':
+                if node.hash is None:
+                    node.hash = TrieNode()
+                node = node.hash
+            else:
+                child = node.children.get(level)
+                if child is None:
+                    child = node.children[level] = TrieNode()
+                node = child
+        node.subscribers[client_id] = qos
+
+    def remove(self, pattern: str, client_id: str):
+        """Remove a client's subscription to a topic filter, pruning emptied nodes"""
+        self._match_cache.clear()
+        path: List[tuple] = []
+        node = self.root
+        for level in pattern.split('/'):
+            if level == '+':
+                child = node.plus
+            elif level == '#':
+                child = node.hash
+            else:
+                child = node.children.get(level)
+            if child is None:
+                return
+            path.append((node, level))
+            node = child
+        node.subscribers.pop(client_id, None)
+
+        # Unlink nodes bottom-up while they are empty
+        for parent, level in reversed(path):
+            if not node.is_empty():
+                break
+            if level == '+':
+                parent.plus = None
+            elif level == '#':
+                parent.hash = None
+            else:
+                del parent.children[level]
+            node = parent
+
+    def match(self, topic: str) -> FrozenSet[str]:
+        """Get the client IDs of every filter matching a topic name"""
+        return self._cached_match(topic)[0]
+
+    def match_qos(self, topic: str) -> Dict[str, int]:
+        """Get each matching client's highest QoS over its filters matching a topic name"""
+        return self._cached_match(topic)[1]
+
+    def _cached_match(self, topic: str) -> Tuple[FrozenSet[str], Dict[str, int]]:
+        """Match a topic name through the cache"""
+        cached = self._match_cache.get(topic)
+        if cached is None:
+            subscribers = self._match(topic)
+            cached = (frozenset(subscribers), subscribers)
+            if len(self._match_cache) >= MATCH_CACHE_SIZE:
+                self._match_cache.clear()
+            self._match_cache[topic] = cached
+        return cached
+
+    def _match(self, topic: str) -> Dict[str, int]:
+        """Walk the trie for a topic name"""
+        subscribers: Dict[str, int] = {}
+        nodes = [self.root]
+        for level in topic.split('/'):
+            next_nodes = []
+            for node in nodes:
+                # '#' matches this level and everything below it
+                if node.hash is not None:
+                    _merge_qos(subscribers, node.hash.subscribers)
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+                if node.plus is not None:
+                    next_nodes.append(node.plus)
+            if not next_nodes:
+                return subscribers
+            nodes = next_nodes
+
+        for node in nodes:
+            _merge_qos(subscribers, node.subscribers)
+            # 'a/#' also matches the parent level 'a'
+            if node.hash is not None:
+                _merge_qos(subscribers, node.hash.subscribers)
+        return subscribers
+
+
+def _merge_qos(into: Dict[str, int], subscribers: Dict[str, int]):
+    """Add a node's subscribers, keeping each client's highest QoS across overlapping filters"""
+    for client_id, qos in subscribers.items():
+        if into.get(client_id, -1) < qos:
+            into[client_id] = qos
@@ -46,9 +46,8 @@ def setup_logging():
     )
 
 
-def print_banner():
-    """Print the broker banner"""
-    banner = """
+# Filled in by print_banner once command-line overrides are applied
+BANNER = """
 ╔══════════════════════════════════════════════════════════════╗
 ║                    DeepROS MQTT Broker                       ║
 ║                                                              ║
@@ -59,15 +58,19 @@ def print_banner():
 ║  Authentication: {}                                    ║
 ║  TLS/SSL:        {}                                    ║
 ╚══════════════════════════════════════════════════════════════╝
-""".format(
+"""
+
+
+def print_banner():
+    """Print the broker banner"""
+    print(BANNER.format(
         settings.mqtt_host,
         settings.mqtt_port,
         settings.websocket_host if settings.websocket_enabled else "Disabled",
         settings.websocket_port if settings.websocket_enabled else "",
         "Enabled" if settings.enable_auth else "Disabled",
         "Enabled" if settings.enable_tls else "Disabled"
-    )
-    print(banner)
+    ))
 
 
 def print_usage():
@@ -197,4 +200,10 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    try:
+        # Same C event loop uvicorn uses for the API (installed with uvicorn[standard])
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main()) 
\ No newline at end of file
@@ -0,0 +1,32 @@
+from typing import Optional, Tuple
+
+Pattern = Tuple[Tuple[str, ...], Optional[Tuple[str, ...]]]
+
+
+def compile_pattern(pattern: str) -> Pattern:
+    """Split a topic filter into its levels and the levels before a trailing '#'"""
+    parts = tuple(pattern.split('/'))
+    # () for '#', ('a',) for 'a/#', None without a trailing '#'
+    hash_prefix = parts[:-1] if parts[-1] == '#' else None
+    return parts, hash_prefix
+
+
+def topic_matches(pattern_parts: Tuple[str, ...], msg_parts: Tuple[str, ...],
+                  hash_prefix: Optional[Tuple[str, ...]]) -> bool:
+    """Check if a compiled topic filter matches a split message topic"""
+    if hash_prefix is not None:
+        # 'a/#' matches 'a' and everything below it
+        if len(msg_parts) < len(hash_prefix):
+            return False
+        pattern_parts, msg_parts = hash_prefix, msg_parts[:len(hash_prefix)]
+
+    if pattern_parts == msg_parts:
+        return True
+
+    # Handle + wildcard
+    if len(pattern_parts) != len(msg_parts):
+        return False
+    for sub_part, msg_part in zip(pattern_parts, msg_parts):
+        if sub_part != '+' and sub_part != msg_part:
+            return False
+    return True
@@ -1,10 +1,13 @@
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, Set, Optional
-from datetime import datetime
+from typing import Callable, Dict, Set, Optional
+from datetime import datetime, timedelta
 import asyncio
+import time
+from .. import clock
 
 
-@dataclass
+@dataclass(slots=True)
 class Client:
     """Represents an MQTT client connection"""
     
@@ -21,30 +24,32 @@ class Client:
     # Connection state
     connected: bool = False
     connected_at: Optional[datetime] = None
-    last_seen: Optional[datetime] = None
+    # Monotonic seconds (time.monotonic, the event loop's clock) of the last activity
+    last_activity: float = field(default_factory=time.monotonic)
     
     # Subscriptions
     subscriptions: Set[str] = field(default_factory=set)
     
     # Message handling
     inflight_messages: Dict[int, 'Message'] = field(default_factory=dict)
-    queued_messages: list = field(default_factory=list)
+    queued_messages: deque = field(default_factory=deque)
     
     # Transport info
     transport: Optional[asyncio.Transport] = None
     protocol: Optional[asyncio.Protocol] = None
     
+    # Called as (counter, delta) when subscriptions, inflight or queued messages change
+    on_count_change: Optional[Callable[[str, int], None]] = field(default=None, repr=False, compare=False)
+    
     def __post_init__(self):
         if self.connected_at is None:
-            self.connected_at = datetime.utcnow()
-        if self.last_seen is None:
-            self.last_seen = datetime.utcnow()
+            self.connected_at = clock.now()
     
     def connect(self, transport: asyncio.Transport, protocol: asyncio.Protocol):
         """Mark client as connected"""
         self.connected = True
-        self.connected_at = datetime.utcnow()
-        self.last_seen = datetime.utcnow()
+        self.connected_at = clock.now()
+        self.last_activity = time.monotonic()
         self.transport = transport
         self.protocol = protocol
     
@@ -54,17 +59,31 @@ class Client:
         self.transport = None
         self.protocol = None
     
+    @property
+    def last_seen(self) -> datetime:
+        """Wall-clock time of the last activity, derived for display"""
+        return datetime.utcnow() - timedelta(seconds=time.monotonic() - self.last_activity)
+    
     def update_last_seen(self):
         """Update the last seen timestamp"""
-        self.last_seen = datetime.utcnow()
+        self.last_activity = time.monotonic()
+    
+    def _count_change(self, counter: str, delta: int):
+        """Report a change in one of the client's collections"""
+        if self.on_count_change:
+            self.on_count_change(counter, delta)
     
     def add_subscription(self, topic: str, qos: int = 0):
         """Add a subscription"""
-        self.subscriptions.add(topic)
+        if topic not in self.subscriptions:
+            self.subscriptions.add(topic)
+            self._count_change('subscriptions', 1)
     
     def remove_subscription(self, topic: str):
         """Remove a subscription"""
-        self.subscriptions.discard(topic)
+        if topic in self.subscriptions:
+            self.subscriptions.discard(topic)
+            self._count_change('subscriptions', -1)
     
     def is_subscribed(self, topic: str) -> bool:
         """Check if client is subscribed to a topic"""
@@ -72,19 +91,26 @@ class Client:
     
     def add_inflight_message(self, message_id: int, message: 'Message'):
         """Add an inflight message"""
+        if message_id not in self.inflight_messages:
+            self._count_change('inflight', 1)
         self.inflight_messages[message_id] = message
     
     def remove_inflight_message(self, message_id: int):
         """Remove an inflight message"""
-        self.inflight_messages.pop(message_id, None)
+        if self.inflight_messages.pop(message_id, None) is not None:
+            self._count_change('inflight', -1)
     
     def queue_message(self, message: 'Message'):
         """Queue a message for delivery"""
         self.queued_messages.append(message)
+        self._count_change('queued', 1)
     
     def get_queued_message(self) -> Optional['Message']:
         """Get the next queued message"""
-        return self.queued_messages.pop(0) if self.queued_messages else None
+        if not self.queued_messages:
+            return None
+        self._count_change('queued', -1)
+        return self.queued_messages.popleft()
     
     def has_queued_messages(self) -> bool:
         """Check if client has queued messages"""
@@ -92,6 +118,4 @@ class Client:
     
     def is_idle(self, timeout_seconds: int = 300) -> bool:
         """Check if client is idle (no activity for timeout_seconds)"""
-        if not self.last_seen:
-            return True
-        return (datetime.utcnow() - self.last_seen).total_seconds() > timeout_seconds 
\ No newline at end of file
+        return time.monotonic() - self.last_activity > timeout_seconds 
\ No newline at end of file
@@ -1,15 +1,24 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Any
-import json
+from typing import Optional, Any, Union
+import orjson
+from .. import clock
 
+_UNPARSED = object()  # payload_json not computed yet
 
-@dataclass
+
+@dataclass(slots=True)
 class Message:
-    """Represents an MQTT message"""
+    """
+    Represents an MQTT message
+
+    `payload` may be a memoryview onto the received PUBLISH packet, so
+    slicing it is O(1); use `bytes(message.payload)` for an owned copy.
+    """
     
     topic: str
-    payload: bytes
+    payload: Union[bytes, memoryview]
     qos: int = 0
     retain: bool = False
     dup: bool = False
@@ -24,25 +33,30 @@ class Message:
     ros_node: Optional[str] = None
     ros_message_type: Optional[str] = None
     
+    # Parsed payload_json; messages are not modified after construction
+    _json: Any = field(default=_UNPARSED, init=False, repr=False, compare=False)
+    
     def __post_init__(self):
         if self.timestamp is None:
-            self.timestamp = datetime.utcnow()
+            self.timestamp = clock.now()
     
     @property
     def payload_str(self) -> str:
         """Get payload as string"""
         try:
-            return self.payload.decode('utf-8')
+            return str(self.payload, 'utf-8')
         except UnicodeDecodeError:
-            return str(self.payload)
+            return str(bytes(self.payload))
     
     @property
     def payload_json(self) -> Optional[Any]:
-        """Get payload as JSON object"""
-        try:
-            return json.loads(self.payload_str)
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            return None
+        """Get payload as JSON object, parsed once from the raw bytes"""
+        if self._json is _UNPARSED:
+            try:
+                self._json = orjson.loads(self.payload)
+            except orjson.JSONDecodeError:
+                self._json = None
+        return self._json
     
     def to_dict(self) -> dict:
         """Convert message to dictionary"""
@@ -90,12 +104,17 @@ class Message:
     
     def extract_ros_info(self):
         """Extract ROS information from topic"""
-        if not self.topic.startswith('ros/'):
+        # ros/<domain>/<node>[/<message_type>...], without splitting the whole topic
+        prefix, sep, rest = self.topic.partition('/')
+        if prefix != 'ros':
             return
         
-        parts = self.topic.split('/')
-        if len(parts) >= 3:
-            self.ros_domain = parts[1]
-            self.ros_node = parts[2]
-            if len(parts) >= 4:
-                self.ros_message_type = parts[3] 
\ No newline at end of file
+        domain, sep, rest = rest.partition('/')
+        if not sep:
+            return
+        node, sep, rest = rest.partition('/')
+        # Interned so retained messages share one copy of each name
+        self.ros_domain = sys.intern(domain)
+        self.ros_node = sys.intern(node)
+        if sep:
+            self.ros_message_type = sys.intern(rest.partition('/')[0])
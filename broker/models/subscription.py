@@ -1,9 +1,11 @@
-from dataclasses import dataclass
-from typing import Set, Optional
+from dataclasses import dataclass, field
+from typing import Set, Optional, Tuple
 from datetime import datetime
+from .. import clock
+from ..matching import compile_pattern, topic_matches
 
 
-@dataclass
+@dataclass(slots=True)
 class Subscription:
     """Represents an MQTT topic subscription"""
     
@@ -12,42 +14,25 @@ class Subscription:
     client_id: str = ""
     timestamp: datetime = None
     
+    # Pattern compiled once in __post_init__
+    _parts: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _hash_prefix: Optional[Tuple[str, ...]] = field(init=False, repr=False, compare=False)
+    
     def __post_init__(self):
         if self.timestamp is None:
-            self.timestamp = datetime.utcnow()
-    
-    def matches_topic(self, message_topic: str) -> bool:
-        """Check if this subscription matches a message topic"""
-        return self._topic_matches(self.topic, message_topic)
+            self.timestamp = clock.now()
+        self._parts, self._hash_prefix = compile_pattern(self.topic)
     
-    def _topic_matches(self, subscription: str, message_topic: str) -> bool:
-        """Check if subscription pattern matches message topic"""
-        sub_parts = subscription.split('/')
-        msg_parts = message_topic.split('/')
-        
-        # Handle exact match
-        if subscription == message_topic:
-            return True
-        
-        # Handle wildcards
-        if subscription == '#':
-            return True
-        
-        if subscription.endswith('/#'):
-            prefix = subscription[:-2]  # Remove '/#'
-            return message_topic.startswith(prefix)
-        
-        # Handle + wildcard
-        if len(sub_parts) != len(msg_parts):
-            return False
-        
-        for sub_part, msg_part in zip(sub_parts, msg_parts):
-            if sub_part == '+':
-                continue
-            if sub_part != msg_part:
-                return False
-        
-        return True
+    def matches_topic(self, message_topic: str, msg_parts: Optional[Tuple[str, ...]] = None) -> bool:
+        """
+        Check if this subscription matches a message topic
+
+        Pass `msg_parts`, the topic already split on '/', when matching one
+        topic against many subscriptions.
+        """
+        if msg_parts is None:
+            msg_parts = tuple(message_topic.split('/'))
+        return topic_matches(self._parts, msg_parts, self._hash_prefix)
     
     def to_dict(self) -> dict:
         """Convert subscription to dictionary"""
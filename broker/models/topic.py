@@ -1,19 +1,25 @@
 from dataclasses import dataclass, field
-from typing import Dict, Set, Optional, List
+from typing import Dict, FrozenSet, Set, Optional, List
 from datetime import datetime
 from .message import Message
 from .subscription import Subscription
+from .. import clock
 
 
-@dataclass
+@dataclass(slots=True)
 class Topic:
     """Represents an MQTT topic"""
     
     name: str
     retained_message: Optional[Message] = None
-    subscribers: Set[str] = field(default_factory=set)  # Set of client IDs
     subscription_qos: Dict[str, int] = field(default_factory=dict)  # client_id -> qos
     
+    # Subscriber client IDs, and a frozen copy handed to readers; the copy is
+    # only rebuilt on the first read after a change, so a burst of subscribes
+    # costs one copy rather than one per subscriber
+    _subs: Set[str] = field(default_factory=set, init=False, repr=False)
+    _subs_snapshot: Optional[FrozenSet[str]] = field(default=frozenset(), init=False, repr=False)
+    
     # Statistics
     message_count: int = 0
     last_message_at: Optional[datetime] = None
@@ -21,21 +27,37 @@ class Topic:
     
     def __post_init__(self):
         if self.created_at is None:
-            self.created_at = datetime.utcnow()
+            self.created_at = clock.now()
+    
+    @property
+    def subscribers(self) -> FrozenSet[str]:
+        """Current snapshot of the subscriber client IDs"""
+        snapshot = self._subs_snapshot
+        if snapshot is None:
+            snapshot = self._subs_snapshot = frozenset(self._subs)
+        return snapshot
     
     def add_subscriber(self, client_id: str, qos: int = 0):
         """Add a subscriber to this topic"""
-        self.subscribers.add(client_id)
+        if client_id not in self._subs:
+            self._subs.add(client_id)
+            self._subs_snapshot = None
         self.subscription_qos[client_id] = qos
     
     def remove_subscriber(self, client_id: str):
         """Remove a subscriber from this topic"""
-        self.subscribers.discard(client_id)
+        if client_id in self._subs:
+            self._subs.discard(client_id)
+            self._subs_snapshot = None
         self.subscription_qos.pop(client_id, None)
     
+    def has_subscriber(self, client_id: str) -> bool:
+        """Check if a client subscribes to this topic"""
+        return client_id in self._subs
+    
     def has_subscribers(self) -> bool:
         """Check if topic has any subscribers"""
-        return len(self.subscribers) > 0
+        return bool(self._subs)
     
     def get_subscriber_qos(self, client_id: str) -> int:
         """Get QoS level for a specific subscriber"""
@@ -60,11 +82,11 @@ class Topic:
     def increment_message_count(self):
         """Increment message counter"""
         self.message_count += 1
-        self.last_message_at = datetime.utcnow()
+        self.last_message_at = clock.now()
     
     def get_subscribers_list(self) -> List[str]:
         """Get list of subscriber client IDs"""
-        return list(self.subscribers)
+        return list(self._subs)
     
     def to_dict(self) -> dict:
         """Convert topic to dictionary"""
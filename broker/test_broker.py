@@ -7,8 +7,8 @@ sample publishers and subscribers.
 """
 
 import asyncio
-import json
 import logging
+import orjson
 from asyncio_mqtt import Client as MQTTClient
 from .core.broker import MQTTBroker
 from .config import settings
@@ -29,7 +29,7 @@ async def test_publisher(broker, topic: str, messages: list):
         
         # Send messages
         for i, message in enumerate(messages):
-            payload = json.dumps(message).encode('utf-8')
+            payload = orjson.dumps(message)
             await client.publish(topic, payload)
             logger.info(f"Published message {i+1}: {message}")
             await asyncio.sleep(1)
@@ -58,9 +58,9 @@ async def test_subscriber(broker, topic: str, client_id: str):
         async with client.messages() as messages:
             async for message in messages:
                 try:
-                    payload = json.loads(message.payload.decode('utf-8'))
+                    payload = orjson.loads(message.payload)
                     logger.info(f"Subscriber {client_id} received: {payload}")
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     logger.info(f"Subscriber {client_id} received: {message.payload.decode('utf-8')}")
         
     except Exception as e:
@@ -100,7 +100,7 @@ async def test_ros_integration(broker):
         
         for message in ros_messages:
             topic = f"ros/{message['domain']}/{message['node']}/{message['message_type']}"
-            payload = json.dumps(message['data']).encode('utf-8')
+            payload = orjson.dumps(message['data'])
             await ros_client.publish(topic, payload)
             logger.info(f"Published ROS message to {topic}")
             await asyncio.sleep(1)
@@ -158,7 +158,7 @@ async def run_tests():
         # Print broker statistics
         stats = broker.get_statistics()
         logger.info("Broker Statistics:")
-        logger.info(json.dumps(stats, indent=2))
+        logger.info(orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode())
         
         # Cancel subscribers
         subscriber1.cancel()
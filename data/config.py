@@ -15,6 +15,8 @@ class DataSettings(BaseSettings):
     MAX_FILE_SIZE_MB: int = 1000  # Maximum size for individual data files
     COMPRESSION_ENABLED: bool = True
     COMPRESSION_LEVEL: int = 6  # 0-9, higher = more compression
+    ZSTD_LEVEL: int = 3  # Zstandard level for real-time recording
+    ARCHIVE_LEVEL: int = 15  # Zstandard level for offline recompression
     
     # Message settings
     MAX_MESSAGE_SIZE_BYTES: int = 10 * 1024 * 1024  # 10MB
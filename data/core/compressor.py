@@ -3,17 +3,57 @@ import zlib
 import bz2
 import lzma
 import logging
-from typing import Optional, Dict, Any, Union
+import struct
+import zstandard as zstd
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, Deque, Dict, Any, List, Tuple, Union
 from ..config import DataSettings
 
 
 logger = logging.getLogger(__name__)
 
+# A batch frame is _FRAME_MAGIC followed by each item with a length prefix. The
+# magic keeps a frame stored uncompressed from being mistaken for a codec's header.
+_FRAME_MAGIC = b'DRF\x01'
+_ITEM_LENGTH = struct.Struct('<I')
+
+# bytes, bytearray, memoryview or any other buffer; the codecs read it in place
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _as_bytes_view(data: Buffer) -> Buffer:
+    """View a typed memoryview as unsigned bytes, without copying, so len() is its size in bytes."""
+    if isinstance(data, memoryview) and data.format != 'B':
+        return data.cast('B')
+    return data
+
+
+# First two bytes of each format's magic number -> (method, full magic number)
+_MAGIC = {
+    b'\x28\xb5': ('zstd', b'\x28\xb5\x2f\xfd'),
+    b'\x1f\x8b': ('gzip', b'\x1f\x8b'),
+    b'\x78\x9c': ('zlib', b'\x78\x9c'),
+    b'\x78\xda': ('zlib', b'\x78\xda'),
+    b'BZ': ('bz2', b'BZ'),
+    b'\xfd7': ('lzma', b'\xfd7zXZ\x00'),
+}
+
+
+def detect_compression_method(data: Buffer) -> Optional[str]:
+    """Auto-detect compression method from data header."""
+    head = bytes(data[:6])
+    entry = _MAGIC.get(head[:2])
+    if entry is not None and head.startswith(entry[1]):
+        return entry[0]
+    return None
+
 
 class MessageCompressor:
     """Message compression and decompression utilities."""
     
     COMPRESSION_METHODS = {
+        'zstd': 'zstd',
         'gzip': 'gzip',
         'zlib': 'zlib', 
         'bz2': 'bz2',
@@ -21,32 +61,147 @@ class MessageCompressor:
         'none': None
     }
     
+    # Payloads smaller than this grow or barely shrink once framed, so they are stored as-is
+    MIN_COMPRESS_BYTES = 96
+    # Payloads over SAMPLE_BYTES * 4 are stored as-is if their first SAMPLE_BYTES compress
+    # to more than this fraction of their size (already compressed images, point clouds, ...)
+    SKIP_COMPRESS_RATIO_THRESHOLD = 0.95
+    SAMPLE_BYTES = 4096
+    # Payloads over this are compressed by zstd worker threads unless compress() is told otherwise
+    MULTITHREAD_MIN_BYTES = 1024 * 1024
+    # Frame buffers kept for reuse by compress_frame, and the largest one worth keeping
+    BUFFER_POOL_SIZE = 8
+    POOLED_BUFFER_MAX_BYTES = 4 * 1024 * 1024
+    
     def __init__(self, settings: Optional[DataSettings] = None):
         self.settings = settings or DataSettings()
-        self.default_method = 'gzip'
+        self.default_method = 'zstd'
         self.default_level = self.settings.COMPRESSION_LEVEL
+        self.zstd_level = self.settings.ZSTD_LEVEL
+        self.archive_level = self.settings.ARCHIVE_LEVEL
+        
+        # Zstandard contexts are reused across calls; one compressor per (level, dictionary, threads)
+        self._zstd_cctx: Dict[Tuple[int, Optional[str], int], zstd.ZstdCompressor] = {}
+        self._zstd_dctx: Dict[Optional[str], zstd.ZstdDecompressor] = {None: zstd.ZstdDecompressor()}
+        
+        # Reusable frame buffers, so steady-state batches don't reallocate (and re-fault) them
+        self._buf_pool: Deque[bytearray] = deque(maxlen=self.BUFFER_POOL_SIZE)
+        
+        # Trained Zstandard dictionaries, keyed by dictionary ID (e.g. topic or message type)
+        self._dicts: Dict[str, zstd.ZstdCompressionDict] = {}
+    
+    def train_dictionary(
+        self,
+        samples: List[bytes],
+        dict_size: int = 16384,
+        dict_id: Optional[str] = None
+    ) -> bytes:
+        """Train a Zstandard dictionary from sample messages, registering it under dict_id if given."""
+        dictionary = zstd.train_dictionary(dict_size, samples)
+        if dict_id is not None:
+            self._register_dictionary(dict_id, dictionary)
+        return dictionary.as_bytes()
+    
+    def load_dictionary(self, dict_id: str, dict_data: bytes):
+        """Register a previously trained dictionary, e.g. one stored with a recording."""
+        self._register_dictionary(dict_id, zstd.ZstdCompressionDict(dict_data))
+    
+    def get_dictionary(self, dict_id: str) -> Optional[bytes]:
+        """Get the raw bytes of a registered dictionary, for storing alongside compressed data."""
+        dictionary = self._dicts.get(dict_id)
+        return dictionary.as_bytes() if dictionary is not None else None
+    
+    def _register_dictionary(self, dict_id: str, dictionary: zstd.ZstdCompressionDict):
+        """Store a dictionary, dropping contexts built from one it replaces."""
+        self._dicts[dict_id] = dictionary
+        self._zstd_dctx.pop(dict_id, None)
+        for key in [key for key in self._zstd_cctx if key[1] == dict_id]:
+            del self._zstd_cctx[key]
+    
+    def _zstd_compressor(
+        self,
+        level: int,
+        dict_id: Optional[str],
+        threads: int = 0,
+        cached: bool = True
+    ) -> zstd.ZstdCompressor:
+        """Get the Zstandard compressor for a level, dictionary and worker thread count."""
+        key = (level, dict_id, threads)
+        cctx = self._zstd_cctx.get(key) if cached else None
+        if cctx is None:
+            if dict_id is None:
+                cctx = zstd.ZstdCompressor(level=level, threads=threads)
+            else:
+                cctx = zstd.ZstdCompressor(
+                    level=level, dict_data=self._get_registered_dictionary(dict_id), threads=threads
+                )
+            if cached:
+                self._zstd_cctx[key] = cctx
+        return cctx
+    
+    def _zstd_decompressor(self, dict_id: Optional[str]) -> zstd.ZstdDecompressor:
+        """Get the cached Zstandard decompressor for a dictionary."""
+        dctx = self._zstd_dctx.get(dict_id)
+        if dctx is None:
+            dctx = self._zstd_dctx[dict_id] = zstd.ZstdDecompressor(
+                dict_data=self._get_registered_dictionary(dict_id)
+            )
+        return dctx
+    
+    def _get_registered_dictionary(self, dict_id: str) -> zstd.ZstdCompressionDict:
+        """Look up a registered dictionary."""
+        dictionary = self._dicts.get(dict_id)
+        if dictionary is None:
+            raise ValueError(f"Unknown compression dictionary: {dict_id}")
+        return dictionary
     
     def compress(
         self, 
-        data: bytes, 
+        data: Buffer, 
         method: Optional[str] = None, 
-        level: Optional[int] = None
+        level: Optional[int] = None,
+        dict_id: Optional[str] = None,
+        threads: Optional[int] = None,
+        reuse_context: bool = True
     ) -> Dict[str, Any]:
-        """Compress data using the specified method."""
-        method = method or self.default_method
-        level = level or self.default_level
+        """
+        Compress data using the specified method and optional zstd dictionary.
+        
+        `threads` sets the zstd worker threads: 0 compresses on the calling
+        thread, -1 uses one per CPU. By default payloads over
+        MULTITHREAD_MIN_BYTES use -1 and smaller ones 0.
+        
+        Cached zstd contexts must not be used from two threads at once; pass
+        `reuse_context=False` when compressing off the caller's thread.
+        
+        The returned data is always `bytes`: a bytearray or memoryview stored
+        uncompressed is copied, so the result never aliases caller memory.
+        """
+        # gzip also writes len(data) into its trailer
+        data = _as_bytes_view(data)
+        original_size = len(data)
+        
+        # Only the default choice falls back to storing as-is; an explicit method is honoured
+        if method is None:
+            method = self.default_method if self._worth_compressing(data) else 'none'
+        level = level or (self.zstd_level if method == 'zstd' else self.default_level)
         
         if method is None or method == 'none':
             return {
-                'data': data,
+                'data': bytes(data),
                 'method': 'none',
-                'original_size': len(data),
-                'compressed_size': len(data),
+                'original_size': original_size,
+                'compressed_size': original_size,
                 'compression_ratio': 1.0
             }
         
         try:
-            if method == 'gzip':
+            if method == 'zstd':
+                if threads is None:
+                    threads = -1 if original_size > self.MULTITHREAD_MIN_BYTES else 0
+                cctx = self._zstd_compressor(level, dict_id, threads, cached=reuse_context)
+                compressed_data = cctx.compress(data)
+            elif method == 'gzip':
                 compressed_data = gzip.compress(data, compresslevel=level)
             elif method == 'zlib':
                 compressed_data = zlib.compress(data, level=level)
@@ -57,39 +212,55 @@ class MessageCompressor:
             else:
                 raise ValueError(f"Unsupported compression method: {method}")
             
-            original_size = len(data)
             compressed_size = len(compressed_data)
             compression_ratio = compressed_size / original_size if original_size > 0 else 1.0
             
-            return {
+            result = {
                 'data': compressed_data,
                 'method': method,
                 'original_size': original_size,
                 'compressed_size': compressed_size,
                 'compression_ratio': compression_ratio
             }
+            if method == 'zstd' and dict_id is not None:
+                result['dict_id'] = dict_id
+            return result
             
         except Exception as e:
             logger.error(f"Compression failed: {e}")
             # Return uncompressed data on failure
             return {
-                'data': data,
+                'data': bytes(data),
                 'method': 'none',
-                'original_size': len(data),
-                'compressed_size': len(data),
+                'original_size': original_size,
+                'compressed_size': original_size,
                 'compression_ratio': 1.0,
                 'error': str(e)
             }
     
+    def _worth_compressing(self, data: Buffer) -> bool:
+        """Check that data is large enough and, for big payloads, compressible enough to compress."""
+        size = len(data)
+        if size < self.MIN_COMPRESS_BYTES:
+            return False
+        if size > self.SAMPLE_BYTES * 4:
+            sample = data[:self.SAMPLE_BYTES]
+            # A one-off context: compress() may run on several threads at once
+            sample_size = len(zstd.ZstdCompressor(level=1).compress(sample))
+            if sample_size > self.SAMPLE_BYTES * self.SKIP_COMPRESS_RATIO_THRESHOLD:
+                return False
+        return True
+    
     def decompress(
         self, 
         data: bytes, 
-        method: Optional[str] = None
+        method: Optional[str] = None,
+        dict_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Decompress data using the specified method."""
+        """Decompress data using the specified method and optional zstd dictionary."""
         if method is None:
             # Try to auto-detect compression method
-            method = self._detect_compression_method(data)
+            method = detect_compression_method(data)
         
         if method is None or method == 'none':
             return {
@@ -99,7 +270,9 @@ class MessageCompressor:
             }
         
         try:
-            if method == 'gzip':
+            if method == 'zstd':
+                decompressed_data = self._zstd_decompressor(dict_id).decompress(data)
+            elif method == 'gzip':
                 decompressed_data = gzip.decompress(data)
             elif method == 'zlib':
                 decompressed_data = zlib.decompress(data)
@@ -125,44 +298,31 @@ class MessageCompressor:
                 'error': str(e)
             }
     
-    def _detect_compression_method(self, data: bytes) -> Optional[str]:
-        """Auto-detect compression method from data header."""
-        if len(data) < 2:
-            return None
-        
-        # Check for gzip magic number
-        if data.startswith(b'\x1f\x8b'):
-            return 'gzip'
-        
-        # Check for zlib magic number
-        if data.startswith(b'\x78\x9c') or data.startswith(b'\x78\xda'):
-            return 'zlib'
-        
-        # Check for bzip2 magic number
-        if data.startswith(b'BZ'):
-            return 'bz2'
-        
-        # Check for LZMA magic number
-        if data.startswith(b'\xfd7zXZ\x00'):
-            return 'lzma'
-        
-        return None
+    def compress_for_archive(self, data: bytes) -> Dict[str, Any]:
+        """Compress data with Zstandard at the archive level, for offline recompression."""
+        return self.compress(data, method='zstd', level=self.archive_level)
+    
+    def _compression_methods(self) -> List[str]:
+        """Methods that actually compress, i.e. everything but 'none'."""
+        return [method for method in self.COMPRESSION_METHODS if method != 'none']
     
     def get_compression_stats(self, data: bytes) -> Dict[str, Any]:
         """Get compression statistics for different methods."""
         stats = {}
+        methods = self._compression_methods()
         
-        for method in self.COMPRESSION_METHODS.keys():
-            if method == 'none':
-                continue
-            
-            result = self.compress(data, method=method)
-            stats[method] = {
-                'compressed_size': result['compressed_size'],
-                'compression_ratio': result['compression_ratio'],
-                'space_saved': result['original_size'] - result['compressed_size'],
-                'space_saved_percent': (1 - result['compression_ratio']) * 100
-            }
+        # The codecs release the GIL, so wall time is that of the slowest method
+        with ThreadPoolExecutor(max_workers=len(methods)) as pool:
+            results = pool.map(
+                lambda method: self.compress(data, method=method, reuse_context=False), methods
+            )
+            for method, result in zip(methods, results):
+                stats[method] = {
+                    'compressed_size': result['compressed_size'],
+                    'compression_ratio': result['compression_ratio'],
+                    'space_saved': result['original_size'] - result['compressed_size'],
+                    'space_saved_percent': (1 - result['compression_ratio']) * 100
+                }
         
         return stats
     
@@ -172,36 +332,55 @@ class MessageCompressor:
         target_ratio: float = 0.5,
         max_time_seconds: float = 5.0
     ) -> Dict[str, Any]:
-        """Find the best compression method for the data."""
+        """
+        Find the best compression method for the data.
+        
+        Returns once a method reaches target_ratio or max_time_seconds has
+        passed; slower methods already running finish in the background.
+        """
         import time
         
         start_time = time.time()
         best_result = None
         best_method = None
         
-        for method in self.COMPRESSION_METHODS.keys():
-            if method == 'none':
-                continue
-            
-            # Check if we've exceeded time limit
-            if time.time() - start_time > max_time_seconds:
-                break
-            
-            try:
-                result = self.compress(data, method=method)
+        # Try every method at once; stop at the first to reach the target ratio or at the time limit
+        pool = ThreadPoolExecutor(max_workers=len(self._compression_methods()))
+        futures = {
+            pool.submit(self.compress, data, method, reuse_context=False): method
+            for method in self._compression_methods()
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                remaining = max_time_seconds - (time.time() - start_time)
+                if remaining <= 0:
+                    break
                 
-                if (best_result is None or 
-                    result['compression_ratio'] < best_result['compression_ratio']):
-                    best_result = result
-                    best_method = method
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    method = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.debug(f"Compression method {method} failed: {e}")
+                        continue
+                    
+                    if (best_result is None or 
+                        result['compression_ratio'] < best_result['compression_ratio']):
+                        # A failed codec falls back to 'none'; report what the data actually is
+                        best_result = result
+                        best_method = result['method']
                 
                 # If we've achieved target ratio, stop
-                if result['compression_ratio'] <= target_ratio:
+                if best_result is not None and best_result['compression_ratio'] <= target_ratio:
                     break
-                    
-            except Exception as e:
-                logger.debug(f"Compression method {method} failed: {e}")
-                continue
+        finally:
+            # Methods not yet started are cancelled. Ones already running cannot be
+            # interrupted: they keep using CPU in the background until they finish
+            # (lzma on large inputs can take seconds), but each has its own codec
+            # state, so later calls on this compressor are unaffected
+            pool.shutdown(wait=False, cancel_futures=True)
         
         if best_result is None:
             # Fallback to no compression
@@ -232,6 +411,90 @@ class MessageCompressor:
         
         return results
     
+    def compress_frame(
+        self,
+        data_list: List[Buffer],
+        method: Optional[str] = None,
+        level: Optional[int] = None,
+        dict_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Compress a list of data items as one length-prefixed frame."""
+        items = [_as_bytes_view(data) for data in data_list]
+        size = len(_FRAME_MAGIC) + sum(map(len, items)) + _ITEM_LENGTH.size * len(items)
+        
+        buffer = self._acquire_buffer(size)
+        try:
+            offsets = []
+            buffer[:len(_FRAME_MAGIC)] = _FRAME_MAGIC
+            position = len(_FRAME_MAGIC)
+            for data in items:
+                _ITEM_LENGTH.pack_into(buffer, position, len(data))
+                position += _ITEM_LENGTH.size
+                offsets.append(position)
+                end = position + len(data)
+                buffer[position:end] = data
+                position = end
+            
+            # compress() copies a frame it stores uncompressed, so the buffer can go back to the pool
+            with memoryview(buffer)[:size] as frame:
+                result = self.compress(frame, method=method, level=level, dict_id=dict_id)
+        finally:
+            self._release_buffer(buffer)
+        
+        result['offsets'] = offsets
+        result['count'] = len(offsets)
+        return result
+    
+    def _acquire_buffer(self, size: int) -> bytearray:
+        """Take a pooled buffer of at least size bytes, or allocate one."""
+        try:
+            buffer = self._buf_pool.pop()
+        except IndexError:
+            return bytearray(size)
+        return buffer if len(buffer) >= size else bytearray(size)
+    
+    def _release_buffer(self, buffer: bytearray):
+        """Return a buffer to the pool unless it is too large to keep around."""
+        if len(buffer) <= self.POOLED_BUFFER_MAX_BYTES:
+            self._buf_pool.append(buffer)
+    
+    def decompress_frame(
+        self,
+        data: Buffer,
+        method: Optional[str] = None,
+        dict_id: Optional[str] = None
+    ) -> List[bytes]:
+        """
+        Decompress a frame built by compress_frame back into its data items.
+        
+        Raises ValueError if the data does not decompress or is not a
+        complete frame.
+        """
+        result = self.decompress(_as_bytes_view(data), method=method, dict_id=dict_id)
+        if 'error' in result:
+            raise ValueError(f"Frame decompression failed: {result['error']}")
+        
+        # A frame stored uncompressed comes back as the caller's buffer, which may be a memoryview
+        buffer = result['data']
+        if bytes(buffer[:len(_FRAME_MAGIC)]) != _FRAME_MAGIC:
+            raise ValueError("Not a compressed frame: missing frame header")
+        
+        items = []
+        offset = len(_FRAME_MAGIC)
+        while offset < len(buffer):
+            if offset + _ITEM_LENGTH.size > len(buffer):
+                raise ValueError(f"Truncated frame: incomplete length prefix at byte {offset}")
+            (length,) = _ITEM_LENGTH.unpack_from(buffer, offset)
+            offset += _ITEM_LENGTH.size
+            if offset + length > len(buffer):
+                raise ValueError(
+                    f"Truncated frame: item {len(items)} needs {length} bytes, "
+                    f"{len(buffer) - offset} left"
+                )
+            items.append(bytes(buffer[offset:offset + length]))
+            offset += length
+        return items
+    
     def batch_decompress(
         self, 
         data_list: list, 
@@ -274,7 +537,14 @@ class MessageCompressor:
             'memory_usage': 'medium'
         }
         
-        if method == 'gzip':
+        if method == 'zstd':
+            info.update({
+                'description': 'Zstandard compression, gzip-level ratios at several times the speed',
+                'typical_ratio': 0.28,
+                'speed': 'very_fast',
+                'memory_usage': 'low'
+            })
+        elif method == 'gzip':
             info.update({
                 'description': 'GNU zip compression, good balance of speed and compression',
                 'typical_ratio': 0.3,
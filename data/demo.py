@@ -310,7 +310,7 @@ async def demonstrate_compression():
     print(f"Original data size: {len(sample_data)} bytes")
     
     # Test different compression methods
-    methods = ['gzip', 'zlib', 'bz2', 'lzma']
+    methods = ['zstd', 'gzip', 'zlib', 'bz2', 'lzma']
     
     for method in methods:
         result = compressor.compress(sample_data, method=method)
@@ -1,8 +1,16 @@
 -- Create additional indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_messages_timestamp_desc ON node_messages(timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_connections_status ON node_connections(status);
-CREATE INDEX IF NOT EXISTS idx_nodes_status ON nodes(status);
-CREATE INDEX IF NOT EXISTS idx_domains_status ON ros_domains(agent_status);
+
+-- Composite indexes matching the API filter + sort paths
+CREATE UNIQUE INDEX IF NOT EXISTS ix_nodes_name_domain ON nodes(name, domain_id);
+CREATE INDEX IF NOT EXISTS ix_nodes_domain_type ON nodes(domain_id, node_type);
+CREATE INDEX IF NOT EXISTS ix_ros_domains_status_id ON ros_domains(agent_status, id);
+CREATE INDEX IF NOT EXISTS ix_nodes_status_id ON nodes(status, id);
+CREATE INDEX IF NOT EXISTS ix_nodes_domain_status ON nodes(domain_id, status);
+CREATE INDEX IF NOT EXISTS ix_msg_conn_ts ON node_messages(connection_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_msg_type_ts ON node_messages(message_type, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_msg_payload_gin ON node_messages USING GIN (payload);
 
 -- Create useful views for common queries
 CREATE OR REPLACE VIEW active_nodes_with_domains AS
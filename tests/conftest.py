@@ -1,58 +1,127 @@
 """Pytest configuration and fixtures."""
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from app.main import app
 from app.database import get_db, Base
 from app.config import settings
 
 
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Fail tests that touch a relationship the CRUD query didn't eager-load
+settings.debug_strict_loading = True
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Use file-based SQLite (aiosqlite) for testing
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+
+# TestClient runs the app on its own event loop, so don't pool connections
+# across loops
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _configure_sqlite(dbapi_connection, connection_record):
+    """Enforce foreign keys and hand transaction control to SQLAlchemy."""
+    # The sqlite3 driver's own BEGIN handling breaks SAVEPOINT, see the
+    # SQLAlchemy "Serializable isolation / Savepoints" notes for SQLite.
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def _begin_sqlite(conn):
+    """Emit BEGIN ourselves now that the driver no longer does."""
+    conn.exec_driver_sql("BEGIN")
+
+
+TestingSessionLocal = async_sessionmaker(
+    class_=AsyncSession, autoflush=False, expire_on_commit=False
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingSessionLocal(bind=engine) as db:
         yield db
-    finally:
-        db.close()
+
+
+async def _run_sync(fn):
+    """Run a synchronous metadata operation on the test engine."""
+    async with engine.begin() as conn:
+        await conn.run_sync(fn)
+    await engine.dispose()
+
+
+async def _open_session():
+    """Open a session inside an outer transaction that is never committed."""
+    connection = await engine.connect()
+    await connection.begin()
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    return connection, session
+
+
+async def _close_session(connection, session):
+    """Discard everything the test wrote."""
+    await session.close()
+    await connection.rollback()
+    await connection.close()
 
 
 @pytest.fixture(scope="session")
 def db_engine():
     """Create database engine for testing."""
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(_run_sync(Base.metadata.create_all))
     yield engine
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(_run_sync(Base.metadata.drop_all))
 
 
 @pytest.fixture
-def db_session(db_engine):
-    """Create database session for testing."""
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+def select_statements():
+    """Record every SELECT the test engine emits, to assert per-endpoint query counts."""
+    statements = []
     
-    yield session
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
     
-    session.close()
-    transaction.rollback()
-    connection.close()
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", _record)
 
 
 @pytest.fixture
-def client(db_session):
+def client(db_engine):
     """Create test client."""
-    app.dependency_overrides[get_db] = lambda: db_session
     with TestClient(app) as test_client:
+        # The session must live on the client's event loop
+        connection, session = test_client.portal.call(_open_session)
+        app.dependency_overrides[get_db] = lambda: session
         yield test_client
-    app.dependency_overrides.clear() 
\ No newline at end of file
+        app.dependency_overrides.clear()
+        test_client.portal.call(_close_session, connection, session)
+
+
+@pytest.fixture
+def connection_id(client):
+    """Create a domain with a talker publishing to a listener, and return the connection id."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "talker_listener_domain"}).json()["id"]
+    node_ids = [
+        client.post(
+            "/api/v1/nodes/",
+            json={"name": name, "domain_id": domain_id, "node_type": "topic"}
+        ).json()["id"]
+        for name in ("talker", "listener")
+    ]
+    return client.post(
+        "/api/v1/connections/",
+        json={
+            "source_node_id": node_ids[0],
+            "target_node_id": node_ids[1],
+            "connection_type": "publisher"
+        }
+    ).json()["id"]
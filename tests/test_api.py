@@ -1,5 +1,6 @@
 """API endpoint tests."""
 
+import json
 import pytest
 from fastapi.testclient import TestClient
 
@@ -73,4 +74,369 @@ def test_get_nodes(client: TestClient):
     response = client.get("/api/v1/nodes/")
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list) 
\ No newline at end of file
+    assert isinstance(data, list)
+
+
+def test_get_nodes_with_cursor(client: TestClient):
+    """Test keyset pagination of nodes via cursor."""
+    domain_response = client.post("/api/v1/domains/", json={"name": "cursor_domain"})
+    domain_id = domain_response.json()["id"]
+    for i in range(3):
+        client.post(
+            "/api/v1/nodes/",
+            json={"name": f"cursor_node_{i}", "domain_id": domain_id, "node_type": "topic"}
+        )
+    
+    response = client.get("/api/v1/nodes/", params={"domain_id": domain_id, "limit": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [n["name"] for n in first_page] == ["cursor_node_0", "cursor_node_1"]
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = client.get(
+        "/api/v1/nodes/", params={"domain_id": domain_id, "limit": 2, "cursor": cursor}
+    )
+    assert response.status_code == 200
+    assert [n["name"] for n in response.json()] == ["cursor_node_2"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_nodes_with_invalid_cursor(client: TestClient):
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/api/v1/nodes/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_create_duplicate_node(client: TestClient):
+    """Test that a duplicate node name in the same domain is rejected."""
+    domain_response = client.post("/api/v1/domains/", json={"name": "dup_domain"})
+    domain_id = domain_response.json()["id"]
+    node_data = {"name": "dup_node", "domain_id": domain_id, "node_type": "topic"}
+    
+    assert client.post("/api/v1/nodes/", json=node_data).status_code == 201
+    response = client.post("/api/v1/nodes/", json=node_data)
+    assert response.status_code == 400
+
+
+def test_create_node_unknown_domain(client: TestClient):
+    """Test creating a node in a domain that does not exist."""
+    node_data = {"name": "orphan_node", "domain_id": 999999, "node_type": "topic"}
+    response = client.post("/api/v1/nodes/", json=node_data)
+    assert response.status_code == 404
+
+
+def test_get_node_by_id(client: TestClient):
+    """Test reading a single node and its 404."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "by_id_domain"}).json()["id"]
+    node_id = client.post(
+        "/api/v1/nodes/",
+        json={"name": "node", "domain_id": domain_id, "node_type": "topic"}
+    ).json()["id"]
+    response = client.get(f"/api/v1/nodes/{node_id}")
+    assert response.status_code == 200
+    assert response.json()["id"] == node_id
+    assert client.get("/api/v1/nodes/999999").status_code == 404
+
+
+def test_cache_stats(client: TestClient):
+    """Test cache stats endpoint with caching disabled."""
+    response = client.get("/meta/cache-stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["enabled"] is False
+    assert {"hits", "misses", "hit_ratio"} <= data.keys()
+
+
+def test_get_domain_with_nodes(client: TestClient):
+    """Test reading a domain together with its nodes."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "with_nodes_domain"}).json()["id"]
+    for name in ("talker", "listener"):
+        client.post(
+            "/api/v1/nodes/",
+            json={"name": name, "domain_id": domain_id, "node_type": "topic"}
+        )
+    response = client.get(f"/api/v1/domains/{domain_id}/with-nodes")
+    assert response.status_code == 200
+    assert sorted(n["name"] for n in response.json()["nodes"]) == ["listener", "talker"]
+    
+    response = client.get("/api/v1/domains/with-nodes")
+    assert response.status_code == 200
+    domain = next(d for d in response.json() if d["id"] == domain_id)
+    assert sorted(n["name"] for n in domain["nodes"]) == ["listener", "talker"]
+
+
+def test_get_message_with_connection(client: TestClient, connection_id: int):
+    """Test reading a message together with its connection's nodes."""
+    message_id = client.post(
+        "/api/v1/messages/", json={"connection_id": connection_id}
+    ).json()["id"]
+
+    response = client.get(f"/api/v1/messages/{message_id}/with-connection")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source_node_name"] == "talker"
+    assert data["target_node_name"] == "listener"
+    assert data["connection_type"] == "publisher"
+
+
+def test_get_nodes_with_combined_filters(client: TestClient):
+    """Test that list filters are ANDed together."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "filter_domain"}).json()["id"]
+    for name, node_type, status in [
+        ("a", "topic", "active"), ("b", "topic", "inactive"), ("c", "service", "active")
+    ]:
+        client.post(
+            "/api/v1/nodes/",
+            json={"name": name, "domain_id": domain_id, "node_type": node_type, "status": status}
+        )
+    response = client.get(
+        "/api/v1/nodes/",
+        params={"domain_id": domain_id, "node_type": "topic", "status": "active"}
+    )
+    assert response.status_code == 200
+    assert [n["name"] for n in response.json()] == ["a"]
+
+
+def test_create_messages_bulk(client: TestClient, connection_id: int):
+    """Test bulk message creation and its connection check."""
+    messages = [{"connection_id": connection_id, "payload": {"seq": i}} for i in range(5)]
+    response = client.post("/api/v1/messages/bulk", json={"messages": messages})
+    assert response.status_code == 201
+    data = response.json()
+    assert [m["payload"]["seq"] for m in data] == list(range(5))
+    assert all("id" in m for m in data)
+
+    response = client.post(
+        "/api/v1/messages/bulk",
+        json={"messages": messages + [{"connection_id": 999999}]}
+    )
+    assert response.status_code == 404
+    assert "999999" in response.json()["detail"]
+
+
+def test_update_node_status(client: TestClient):
+    """Test the status PATCH endpoint and its 404."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "status_domain"}).json()["id"]
+    node_id = client.post(
+        "/api/v1/nodes/",
+        json={"name": "node", "domain_id": domain_id, "node_type": "topic"}
+    ).json()["id"]
+    response = client.patch(f"/api/v1/nodes/{node_id}/status", params={"status": "active"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "active"
+    assert client.get(f"/api/v1/nodes/{node_id}").json()["status"] == "active"
+    response = client.patch("/api/v1/nodes/999999/status", params={"status": "active"})
+    assert response.status_code == 404
+
+
+def test_get_nodes_by_unknown_domain(client: TestClient):
+    """Test the by-domain listing's existence check."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "exists_domain"}).json()["id"]
+    assert client.get(f"/api/v1/nodes/by-domain/{domain_id}").json() == []
+    response = client.get("/api/v1/nodes/by-domain/999999")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Domain not found"
+
+
+def test_stream_messages(client: TestClient, connection_id: int):
+    """Test NDJSON message streaming with a filter."""
+    messages = [
+        {"connection_id": connection_id, "message_type": "odom" if i % 2 else "scan"}
+        for i in range(4)
+    ]
+    client.post("/api/v1/messages/bulk", json={"messages": messages})
+
+    response = client.get("/api/v1/messages/stream", params={"message_type": "odom"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 2
+    assert all(line["message_type"] == "odom" for line in lines)
+
+
+def test_get_node_conditional(client: TestClient):
+    """Test ETag / If-None-Match handling on a single-node read."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "etag_domain"}).json()["id"]
+    node_id = client.post(
+        "/api/v1/nodes/",
+        json={"name": "node", "domain_id": domain_id, "node_type": "topic"}
+    ).json()["id"]
+    response = client.get(f"/api/v1/nodes/{node_id}")
+    etag = response.headers["etag"]
+    assert "last-modified" in response.headers
+
+    response = client.get(f"/api/v1/nodes/{node_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    client.put(f"/api/v1/nodes/{node_id}", json={"status": "active"})
+    response = client.get(f"/api/v1/nodes/{node_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_create_connection_missing_nodes(client: TestClient):
+    """Test which endpoint node a failed connection insert reports."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "conn_domain"}).json()["id"]
+    node_id = client.post(
+        "/api/v1/nodes/",
+        json={"name": "talker", "domain_id": domain_id, "node_type": "topic"}
+    ).json()["id"]
+    connection = {"source_node_id": node_id, "target_node_id": node_id, "connection_type": "publisher"}
+
+    response = client.post("/api/v1/connections/", json={**connection, "source_node_id": 999999})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Source node not found"
+
+    response = client.post("/api/v1/connections/", json={**connection, "target_node_id": 999999})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Target node not found"
+
+    assert client.post("/api/v1/connections/", json=connection).status_code == 201
+    assert client.post("/api/v1/connections/", json=connection).status_code == 400
+
+
+def test_get_recent_messages(client: TestClient, connection_id: int):
+    """Test the database-side recent-messages cutoff."""
+    client.post("/api/v1/messages/", json={"connection_id": connection_id})
+
+    response = client.get("/api/v1/messages/recent", params={"hours": 1})
+    assert response.status_code == 200
+    assert [m["connection_id"] for m in response.json()] == [connection_id]
+    response = client.get("/api/v1/messages/", params={"hours": 1, "connection_id": connection_id})
+    assert len(response.json()) == 1
+
+
+def test_update_domain_status(client: TestClient):
+    """Test the domain status PATCH endpoint and the active listing."""
+    domain_id = client.post(
+        "/api/v1/domains/", json={"name": "idle_domain", "agent_status": "inactive"}
+    ).json()["id"]
+    active = client.get("/api/v1/domains/active").json()
+    assert domain_id not in [d["id"] for d in active]
+    response = client.patch(f"/api/v1/domains/{domain_id}/status", params={"status": "active"})
+    assert response.status_code == 200
+    assert response.json()["agent_status"] == "active"
+    active = client.get("/api/v1/domains/active").json()
+    assert domain_id in [d["id"] for d in active]
+    response = client.patch("/api/v1/domains/999999/status", params={"status": "active"})
+    assert response.status_code == 404
+
+
+def test_get_domains_by_status_with_cursor(client: TestClient):
+    """Test keyset pagination of a domain status listing."""
+    for i in range(3):
+        client.post("/api/v1/domains/", json={"name": f"paged_domain_{i}", "agent_status": "paged"})
+    
+    response = client.get("/api/v1/domains/", params={"status": "paged", "limit": 2})
+    assert [d["name"] for d in response.json()] == ["paged_domain_0", "paged_domain_1"]
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = client.get("/api/v1/domains/", params={"status": "paged", "limit": 2, "cursor": cursor})
+    assert [d["name"] for d in response.json()] == ["paged_domain_2"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_node_metadata_round_trip(client: TestClient):
+    """Test node metadata is stored, updated and returned under its API name."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "meta_domain"}).json()["id"]
+    response = client.post(
+        "/api/v1/nodes/",
+        json={"name": "meta_node", "domain_id": domain_id, "node_type": "topic", "metadata": {"hz": 10}}
+    )
+    node = response.json()
+    assert node["metadata"] == {"hz": 10}
+    assert "metadata_" not in node
+    response = client.put(f"/api/v1/nodes/{node['id']}", json={"metadata": {"hz": 20}})
+    assert response.json()["metadata"] == {"hz": 20}
+    assert client.get(f"/api/v1/nodes/{node['id']}").json()["metadata"] == {"hz": 20}
+    response = client.put(f"/api/v1/nodes/{node['id']}", json={"metadata": None})
+    assert response.status_code == 422
+    
+    other = client.post(
+        "/api/v1/nodes/", json={"name": "bare_node", "domain_id": domain_id, "node_type": "topic"}
+    ).json()
+    assert other["metadata"] == {}
+
+
+def test_get_domains_with_nodes_query_count(client: TestClient, select_statements):
+    """Test the with-nodes listing loads nodes in one batch, not per domain."""
+    for i in range(3):
+        domain_id = client.post("/api/v1/domains/", json={"name": f"batch_domain_{i}"}).json()["id"]
+        client.post("/api/v1/nodes/", json={"name": "node", "domain_id": domain_id, "node_type": "topic"})
+    select_statements.clear()
+    response = client.get("/api/v1/domains/with-nodes")
+    assert response.status_code == 200
+    assert len(response.json()) >= 3
+    assert len(select_statements) == 2
+
+
+def test_update_domain_status_single_statement(client: TestClient, select_statements):
+    """Test a status flip is one UPDATE ... RETURNING, with no SELECT around it."""
+    domain_id = client.post("/api/v1/domains/", json={"name": "flip_domain"}).json()["id"]
+    select_statements.clear()
+    response = client.patch(f"/api/v1/domains/{domain_id}/status", params={"status": "active"})
+    assert response.json()["agent_status"] == "active"
+    assert select_statements == []
+
+
+def test_get_active_domains_conditional(client: TestClient):
+    """Test ETag revalidation of the active-domains listing."""
+    client.post("/api/v1/domains/", json={"name": "polled_domain", "agent_status": "active"})
+    etag = client.get("/api/v1/domains/active").headers["etag"]
+    response = client.get("/api/v1/domains/active", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    client.post("/api/v1/domains/", json={"name": "new_domain", "agent_status": "active"})
+    response = client.get("/api/v1/domains/active", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_cors_preflight(client: TestClient):
+    """Test preflights are answered for configured origins only."""
+    headers = {"Access-Control-Request-Method": "GET", "Access-Control-Request-Headers": "If-None-Match"}
+    response = client.options(
+        "/api/v1/nodes/", headers={"Origin": "http://localhost:3000", **headers}
+    )
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["access-control-max-age"] == "86400"
+    response = client.options("/api/v1/nodes/", headers={"Origin": "http://evil.example", **headers})
+    assert response.status_code == 400
+
+
+def test_import_messages(client: TestClient, connection_id: int):
+    """Test NDJSON message import and its error handling."""
+    body = "\n".join(
+        json.dumps({"connection_id": connection_id, "message_type": "std_msgs/String", "payload": {"i": i}})
+        for i in range(3)
+    )
+    response = client.post(
+        "/api/v1/messages/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 201
+    assert response.json() == {"inserted": 3}
+    messages = client.get(f"/api/v1/messages/by-connection/{connection_id}").json()
+    assert sorted(m["payload"]["i"] for m in messages) == [0, 1, 2]
+    
+    response = client.post("/api/v1/messages/import", content=json.dumps({"connection_id": 999999}))
+    assert response.status_code == 404
+    response = client.post("/api/v1/messages/import", content=body + "\n{not json")
+    assert response.status_code == 422
+    assert len(client.get(f"/api/v1/messages/by-connection/{connection_id}").json()) == 3
+
+
+def test_delete_domain_cascades(client: TestClient, connection_id: int):
+    """Test that deleting a domain removes its nodes, connections and messages."""
+    message_id = client.post("/api/v1/messages/", json={"connection_id": connection_id}).json()["id"]
+    node_id = client.get(f"/api/v1/connections/{connection_id}").json()["source_node_id"]
+    domain_id = client.get(f"/api/v1/nodes/{node_id}").json()["domain_id"]
+
+    response = client.delete(f"/api/v1/domains/{domain_id}")
+    assert response.status_code == 200
+    assert client.get(f"/api/v1/nodes/{node_id}").status_code == 404
+    assert client.get(f"/api/v1/connections/{connection_id}").status_code == 404
+    assert client.get(f"/api/v1/messages/{message_id}").status_code == 404
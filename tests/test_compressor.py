@@ -0,0 +1,105 @@
+"""MessageCompressor tests."""
+
+import os
+import pytest
+from data.config import DataSettings
+from data.core.compressor import MessageCompressor
+
+
+@pytest.fixture
+def compressor(tmp_path):
+    """Create a compressor whose settings don't touch the working directory."""
+    return MessageCompressor(DataSettings(DATA_DIR=str(tmp_path)))
+
+
+def test_default_method_skips_tiny_payload(compressor: MessageCompressor):
+    """Test that the default path stores payloads under MIN_COMPRESS_BYTES as-is."""
+    result = compressor.compress(b"short ros msg")
+    assert result["method"] == "none"
+    assert result["data"] == b"short ros msg"
+
+
+def test_default_method_skips_incompressible_payload(compressor: MessageCompressor):
+    """Test that the default path stores incompressible payloads as-is."""
+    data = os.urandom(compressor.SAMPLE_BYTES * 5)
+    assert compressor.compress(data)["method"] == "none"
+
+
+def test_explicit_method_is_honoured_for_tiny_payload(compressor: MessageCompressor):
+    """Test that an explicitly requested codec is always used."""
+    for method in ("zstd", "gzip", "zlib", "bz2", "lzma"):
+        result = compressor.compress(b"short ros msg", method=method)
+        assert result["method"] == method
+        assert compressor.decompress(result["data"], method)["data"] == b"short ros msg"
+
+
+def test_optimize_compression_reports_usable_method(compressor: MessageCompressor):
+    """Test that the reported method decompresses the returned data."""
+    optimized = compressor.optimize_compression(b"short ros msg")
+    assert optimized["method"] == optimized["result"]["method"]
+    decompressed = compressor.decompress(optimized["result"]["data"], optimized["method"])
+    assert decompressed["data"] == b"short ros msg"
+
+
+def test_threaded_methods_leave_cached_contexts_alone(compressor: MessageCompressor):
+    """Test that stats and optimisation workers don't use the shared zstd contexts."""
+    data = b"sensor_msgs/Imu orientation angular_velocity linear_acceleration " * 50
+    compressor.get_compression_stats(data)
+    compressor.optimize_compression(data, target_ratio=1.0)
+    assert compressor._zstd_cctx == {}
+
+
+def test_frame_round_trip(compressor: MessageCompressor):
+    """Test that compress_frame/decompress_frame round-trip with every codec."""
+    items = [b"/odom " * 40, b"", b"/tf " * 30]
+    for method in (None, "zstd", "gzip", "zlib", "bz2", "lzma", "none"):
+        result = compressor.compress_frame(items, method=method)
+        assert result["count"] == 3
+        assert compressor.decompress_frame(result["data"]) == items
+
+
+def test_frame_empty_items(compressor: MessageCompressor):
+    """Test frames with no items and with only empty items."""
+    for items in ([], [b""], [b"", b""]):
+        result = compressor.compress_frame(items)
+        assert compressor.decompress_frame(result["data"]) == items
+
+
+def test_frame_uncompressed_is_not_detected_as_codec(compressor: MessageCompressor):
+    """Test that an uncompressed frame whose first length reads as a codec magic round-trips."""
+    # 23106 encodes as b"BZ\x00\x00", the bz2 magic prefix
+    items = [os.urandom(23106), os.urandom(64)]
+    result = compressor.compress_frame(items)
+    assert result["method"] == "none"
+    assert compressor.decompress_frame(result["data"]) == items
+
+
+def test_frame_truncation_is_reported(compressor: MessageCompressor):
+    """Test that truncated or malformed frames raise ValueError."""
+    frame = compressor.compress_frame([b"ab", b"cd"], method="none")["data"]
+    with pytest.raises(ValueError):
+        compressor.decompress_frame(frame[:-1], method="none")
+    with pytest.raises(ValueError):
+        compressor.decompress_frame(frame + b"\x01\x00", method="none")
+    with pytest.raises(ValueError):
+        compressor.decompress_frame(b"\x05\x00\x00\x00ab", method="none")
+
+
+def test_uncompressed_result_does_not_alias_caller_buffer(compressor: MessageCompressor):
+    """Test that a buffer stored as-is comes back as an independent bytes copy."""
+    data = bytearray(b"short ros msg")
+    for buffer in (data, memoryview(data)):
+        result = compressor.compress(buffer)
+        assert result["method"] == "none"
+        assert type(result["data"]) is bytes
+    data[:5] = b"SHORT"
+    assert result["data"] == b"short ros msg"
+
+
+def test_frame_from_buffers(compressor: MessageCompressor):
+    """Test that frames decompress from bytearray and memoryview buffers."""
+    items = [b"/odom " * 40, b"/tf " * 30]
+    for method in ("none", "zstd"):
+        frame = compressor.compress_frame(items, method=method)["data"]
+        for buffer in (bytearray(frame), memoryview(frame)):
+            assert compressor.decompress_frame(buffer) == items
@@ -0,0 +1,122 @@
+"""MQTT protocol tests."""
+
+import asyncio
+import struct
+import pytest
+from broker.config import settings
+from broker.core.broker import MQTTBroker
+from broker.core.protocol import MQTTProtocol, encode_remaining_length, read_packet
+
+
+class FakeTransport:
+    """Collect everything a protocol writes."""
+    
+    def __init__(self):
+        self.written = bytearray()
+        self.closed = False
+    
+    def write(self, data):
+        self.written += data
+    
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.written += chunk
+    
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+    
+    def get_extra_info(self, name, default=None):
+        return default
+    
+    def close(self):
+        self.closed = True
+
+
+def _string(value: str) -> bytes:
+    """Encode a length-prefixed MQTT string."""
+    encoded = value.encode("utf-8")
+    return struct.pack("!H", len(encoded)) + encoded
+
+
+def _packet(fixed_byte: int, body: bytes) -> bytes:
+    """Frame a packet body with its fixed header."""
+    return bytes((fixed_byte,)) + encode_remaining_length(len(body)) + body
+
+
+def _reader(data: bytes) -> asyncio.StreamReader:
+    """Create a stream reader holding `data` followed by EOF."""
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def _read_all(data: bytes) -> list:
+    """Split written bytes back into packets."""
+    reader = _reader(data)
+    packets = []
+    while (packet := await read_packet(reader)) is not None:
+        packets.append(packet)
+    return packets
+
+
+def _connect(broker: MQTTBroker, client_id: str) -> MQTTProtocol:
+    """Open a protocol on a fake transport and send CONNECT through it."""
+    protocol = MQTTProtocol(broker)
+    protocol.connection_made(FakeTransport())
+    body = _string("MQTT") + struct.pack("!BBH", 4, 0x02, 0) + _string(client_id)
+    protocol.packet_received(0x10, body)
+    return protocol
+
+
+@pytest.mark.parametrize("length", [0, 127, 128, 16383, 16384, 2097152])
+async def test_read_packet_remaining_lengths(length: int):
+    """Test that read_packet decodes one- to four-byte remaining lengths."""
+    body = bytes(range(256)) * (length // 256) + bytes(length % 256)
+    reader = _reader(_packet(0x30, body) + b"\xc0\x00")
+    assert await read_packet(reader) == (0x30, body)
+    assert await read_packet(reader) == (0xC0, b"")
+    assert await read_packet(reader) is None
+
+
+async def test_read_packet_rejects_oversized_body(monkeypatch):
+    """Test that a remaining length over max_message_size is refused before the body is read."""
+    monkeypatch.setattr(settings, "max_message_size", 1000)
+    with pytest.raises(ValueError):
+        await read_packet(_reader(b"\x30" + encode_remaining_length(1001)))
+    assert await read_packet(_reader(_packet(0x30, bytes(1000)))) == (0x30, bytes(1000))
+
+
+async def test_read_packet_rejects_malformed_length():
+    """Test that a remaining length longer than four bytes is refused."""
+    with pytest.raises(ValueError):
+        await read_packet(_reader(b"\x30\xff\xff\xff\xff\x01"))
+
+
+@pytest.mark.parametrize("data", [b"", b"\x30", b"\x30\x80", b"\x30\xff\xff", b"\x30\x05ab"])
+async def test_read_packet_eof_mid_packet(data: bytes):
+    """Test that a connection closed part-way through a packet reads as closed."""
+    assert await read_packet(_reader(data)) is None
+
+
+async def test_publish_round_trip():
+    """Test a QoS 1 PUBLISH from CONNECT through to a wildcard subscriber."""
+    broker = MQTTBroker()
+    subscriber = _connect(broker, "subscriber")
+    publisher = _connect(broker, "publisher")
+    
+    subscriber.packet_received(0x82, struct.pack("!H", 1) + _string("robot/#") + b"\x01")
+    publisher.packet_received(0x32, _string("robot/odom") + struct.pack("!H", 7) + b"pose")
+    
+    assert await _read_all(publisher.transport.written) == [
+        (0x20, b"\x00\x00"),  # CONNACK accepted
+        (0x40, b"\x00\x07"),  # PUBACK for message 7
+    ]
+    connack, suback, publish = await _read_all(subscriber.transport.written)
+    assert connack == (0x20, b"\x00\x00")
+    assert suback == (0x90, b"\x00\x01\x01")
+    # Delivered at QoS 1, the lower of the published and subscribed QoS
+    fixed_byte, body = publish
+    assert fixed_byte == 0x32
+    assert body[:12] == _string("robot/odom")
+    assert body[14:] == b"pose"
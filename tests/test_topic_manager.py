@@ -0,0 +1,142 @@
+"""Broker topic routing tests."""
+
+import random
+import pytest
+from broker.core.topic_manager import TopicManager
+from broker.models.message import Message
+
+
+@pytest.fixture
+def topic_manager():
+    """Create an empty topic manager."""
+    return TopicManager()
+
+
+def test_subscription_qos_covers_wildcards(topic_manager: TopicManager):
+    """Test that each subscriber gets the highest QoS of its matching subscriptions."""
+    topic_manager.subscribe("wild", "sensors/+", 1)
+    topic_manager.subscribe("wild", "sensors/#", 2)
+    topic_manager.subscribe("exact", "sensors/imu", 1)
+    topic_manager.subscribe("both", "sensors/imu", 0)
+    topic_manager.subscribe("both", "#", 1)
+    assert topic_manager.get_subscription_qos("sensors/imu") == {"wild": 2, "exact": 1, "both": 1}
+    
+    topic_manager.unsubscribe("wild", "sensors/#")
+    assert topic_manager.get_subscription_qos("sensors/imu")["wild"] == 1
+    
+    # Subscribing again to the same filter replaces its QoS
+    topic_manager.subscribe("wild", "sensors/+", 0)
+    assert topic_manager.get_subscription_qos("sensors/imu")["wild"] == 0
+
+
+def test_wildcard_matching(topic_manager: TopicManager):
+    """Test '+' and '#' matching through the topic trie."""
+    patterns = {
+        "plus": "robot/+/odom",
+        "hash": "robot/#",
+        "root": "#",
+        "a_hash": "a/#",
+        "a_plus": "a/+",
+    }
+    for client_id, pattern in patterns.items():
+        topic_manager.subscribe(client_id, pattern)
+    
+    assert topic_manager.get_subscribers("robot/r1/odom") == {"plus", "hash", "root"}
+    assert topic_manager.get_subscribers("robot/r1/odom/raw") == {"hash", "root"}
+    assert topic_manager.get_subscribers("robot") == {"hash", "root"}
+    # 'a/#' matches 'a' itself and everything below it, but not a sibling prefix
+    assert topic_manager.get_subscribers("a") == {"a_hash", "root"}
+    assert topic_manager.get_subscribers("a/b/c") == {"a_hash", "root"}
+    assert topic_manager.get_subscribers("a/b") == {"a_hash", "a_plus", "root"}
+    assert topic_manager.get_subscribers("ab/c") == {"root"}
+    
+    # The trie agrees with the per-pattern matcher
+    for topic in ("robot/r1/odom", "robot", "a", "ab/c", "a/b/c", "x/y"):
+        expected = {
+            client_id for client_id, pattern in patterns.items()
+            if topic_manager._topic_matches_pattern(topic, pattern)
+        }
+        assert topic_manager.get_subscribers(topic) == expected
+
+
+def test_unsubscribe_prunes_trie_and_invalidates_matches(topic_manager: TopicManager):
+    """Test that unsubscribing removes emptied trie nodes and stale cached matches."""
+    topic_manager.subscribe("c1", "robot/+/odom")
+    assert topic_manager.get_subscribers("robot/r1/odom") == {"c1"}
+    
+    # A cached match is refreshed when a subscription is added
+    topic_manager.subscribe("c2", "robot/#")
+    assert topic_manager.get_subscribers("robot/r1/odom") == {"c1", "c2"}
+    
+    topic_manager.unsubscribe("c1", "robot/+/odom")
+    assert topic_manager.get_subscribers("robot/r1/odom") == {"c2"}
+    assert topic_manager.wildcard_trie.root.children["robot"].plus is None
+    
+    topic_manager.unsubscribe("c2", "robot/#")
+    assert topic_manager.get_subscribers("robot/r1/odom") == frozenset()
+    assert topic_manager.wildcard_trie.root.is_empty()
+    assert topic_manager.wildcard_subscriptions == {}
+
+
+def test_remove_client_subscriptions(topic_manager: TopicManager):
+    """Test that removing a client drops only its exact and wildcard subscriptions."""
+    for client_id in ("gone", "kept"):
+        topic_manager.subscribe(client_id, "robot/odom")
+        topic_manager.subscribe(client_id, "robot/#")
+    topic_manager.subscribe("gone", "robot/+/scan")
+    
+    topic_manager.remove_client_subscriptions("gone")
+    assert topic_manager.get_client_subscriptions("gone") == []
+    assert sorted(topic_manager.get_client_subscriptions("kept")) == ["robot/#", "robot/odom"]
+    assert topic_manager.get_subscribers("robot/odom") == {"kept"}
+    assert topic_manager.get_subscribers("robot/r1/scan") == {"kept"}
+    assert "robot/+/scan" not in topic_manager.wildcard_subscriptions
+
+
+def test_cleanup_empty_topics(topic_manager: TopicManager):
+    """Test that only topics without subscribers or a retained message are removed."""
+    topic_manager.subscribe("c1", "robot/odom")
+    topic_manager.subscribe("c1", "robot/status")
+    topic_manager.publish_message(Message(topic="robot/status", payload=b"up", retain=True))
+    topic_manager.unsubscribe("c1", "robot/odom")
+    topic_manager.unsubscribe("c1", "robot/status")
+    
+    topic_manager.cleanup_empty_topics()
+    assert "robot/odom" not in topic_manager.topics
+    assert "robot/status" in topic_manager.topics
+    
+    # Clearing the retained message makes the topic removable
+    topic_manager.publish_message(Message(topic="robot/status", payload=b"", retain=True))
+    topic_manager.cleanup_empty_topics()
+    assert topic_manager.topics == {}
+
+
+def test_statistics_match_recount(topic_manager: TopicManager):
+    """Test that the running statistics counters match a full recount."""
+    rng = random.Random(0)
+    clients = [f"c{i}" for i in range(8)]
+    filters = ["robot/odom", "robot/scan", "robot/+", "robot/#", "+/odom", "#"]
+    for _ in range(2000):
+        client_id, pattern = rng.choice(clients), rng.choice(filters)
+        action = rng.random()
+        if action < 0.45:
+            topic_manager.subscribe(client_id, pattern, rng.randint(0, 2))
+        elif action < 0.8:
+            topic_manager.unsubscribe(client_id, pattern)
+        elif action < 0.85:
+            topic_manager.remove_client_subscriptions(client_id)
+        elif action < 0.95:
+            topic = rng.choice(["robot/odom", "robot/scan"])
+            payload = rng.choice([b"", b"data"])
+            topic_manager.publish_message(Message(topic=topic, payload=payload, retain=True))
+        else:
+            topic_manager.cleanup_empty_topics()
+        
+        topics = topic_manager.topics.values()
+        stats = topic_manager.get_statistics()
+        assert stats["total_topics"] == len(topic_manager.topics)
+        assert stats["total_subscribers"] == (
+            sum(len(topic.subscribers) for topic in topics)
+            + sum(len(clients) for clients in topic_manager.wildcard_subscriptions.values())
+        )
+        assert stats["total_retained_messages"] == sum(topic.has_retained_message() for topic in topics)